@@ -4,11 +4,23 @@ BeautiFi IoT - Main Flask Application
 Fan control server with telemetry collection for DUAN Proof-of-Air.
 """
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template
+from werkzeug.exceptions import BadRequest
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import random
+import sys
 import subprocess
 import threading
 import time
+import uuid
 import atexit
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 # Configuration
 from config import (
@@ -22,16 +34,21 @@ from config import (
     VERIFIER_API_KEY,
     SYNC_INTERVAL_SECONDS,
     ENABLE_VERIFIER_SYNC,
+    VERIFIER_BATCH_SAMPLES,
     BACKEND_URL,
+    LOG_LEVEL,
+    MQTT_BROKER_HOST,
+    MQTT_BROKER_PORT,
+    MQTT_KEEPALIVE_SECONDS,
     CALIBRATION_DURATION_MINUTES,
 )
 
 # Telemetry
 from telemetry import TelemetryCollector
-from sensors import FanInterpolator
+from sensors import FanInterpolator, SimulatedSensors
 
 # Network / Verifier
-from network import VerifierClient
+from network import VerifierClient, PeerBrowser, get_local_ip, get_shared_session
 
 # Registration
 from registration import CommissioningManager, RegistrationClient, HardwareManifest
@@ -39,16 +56,245 @@ from registration import CommissioningManager, RegistrationClient, HardwareManif
 # OTA Updates
 from ota import UpdateManager, ConfigManager
 
+# Fast JSON encoding (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Sample signature verification (optional - needs the cryptography package)
+try:
+    from crypto import verify_signature
+    CRYPTO_AVAILABLE = True
+except ImportError:
+    CRYPTO_AVAILABLE = False
+
+# Production WSGI server (optional - falls back to Flask's built-in server)
+try:
+    from waitress import serve
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+WAITRESS_THREADS = 8
+
+# DMA-timed PWM via the pigpio daemon (optional - falls back to RPi.GPIO software PWM)
+try:
+    import pigpio
+    PIGPIO_AVAILABLE = True
+except ImportError:
+    PIGPIO_AVAILABLE = False
+
+# MQTT command push (optional - falls back to HTTP long-polling)
+try:
+    import paho.mqtt.client as mqtt
+    MQTT_AVAILABLE = True
+except ImportError:
+    MQTT_AVAILABLE = False
+
+# --- Logging ---
+# Same plain "[TAG] message" lines as print(), but filtered by level and
+# formatted lazily, so chatty paths cost nothing when disabled. The root
+# logger is configured in __main__, not on import.
+cmd_log = logging.getLogger("beautifi.cmd")
+ota_log = logging.getLogger("beautifi.ota")
+
 # --- Flask Setup ---
 app = Flask(__name__, template_folder='templates')
 
 # --- Fan State ---
-current_speeds = {name: 0 for name in FAN_PWM_PINS}
+current_speeds = dict.fromkeys(FAN_PWM_PINS, 0)
+_speed_lock = threading.Lock()
+_speed_sum = 0.0  # Running sum of current_speeds, kept in step by set_fan()
+_fans_on_count = 0  # Number of non-zero entries in current_speeds
+FAN_COUNT = len(FAN_PWM_PINS)
+_INV_FAN_COUNT = 1.0 / FAN_COUNT if FAN_COUNT else 0.0
+# Immutable (speeds, average_pwm) published by writers for lock-free readers
+_speeds_snapshot = (dict(current_speeds), 0.0)
+# Exactly one of these is set; set_fan() flips them so waiters wake on change
+fans_all_off = threading.Event()
+fans_all_off.set()
+fans_running = threading.Event()
+_fans_off_since = time.monotonic()  # When fans_all_off was last set (fans start off)
+_ramp_cond = threading.Condition()
+_ramp_target = None  # Newest (speed, staggered) request, consumed by _ramp_worker()
+_ramp_thread = None
 fan_interpolator = FanInterpolator()
+sim_sensors = SimulatedSensors(fan_interpolator)
+
+# --- Static Response Caches ---
+HOSTNAME = socket.gethostname()
+MANIFEST_CACHE_SECONDS = 86400
+STATUS_CACHE_SECONDS = 5     # Slow-changing status views polled by dashboards
+IDENTITY_CACHE_SECONDS = 300  # Device identity only changes on re-provisioning
+
+_manifest_cache = {"body": None, "gzip": None, "etag": None, "expires_at": 0.0}
+_manifest_lock = threading.Lock()
+
+# path -> (expires_at, etag, body, gzip body or None) for @ttl_etag views
+_ttl_cache = {}
+
+
+def json_bytes(data) -> bytes:
+    """Serialize to JSON bytes with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+def json_loads(raw):
+    """Parse JSON bytes/str with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_body():
+    """
+    Parse the request's JSON body with orjson when available.
+
+    Reads the body once without caching it on the request. Returns None when
+    the request isn't JSON or is empty; malformed JSON is a 400.
+    """
+    if not request.is_json:
+        return None
+    raw = request.get_data(cache=False)
+    if not raw:
+        return None
+    try:
+        return json_loads(raw)
+    except ValueError:
+        raise BadRequest("Invalid JSON body")
+
+
+def ojsonify(data) -> Response:
+    """jsonify() replacement that encodes with orjson when available."""
+    if ORJSON_AVAILABLE:
+        try:
+            return Response(orjson.dumps(data), mimetype='application/json')
+        except TypeError:
+            pass  # e.g. non-str keys; let Flask's encoder handle it
+    return jsonify(data)
+
+
+STREAM_LIST_THRESHOLD = 200  # Rows above which list endpoints stream the body
+STREAM_LIST_CHUNK_ROWS = 64
+
+
+def json_list_response(key: str, rows: list) -> Response:
+    """
+    {"count": N, key: rows} as JSON, streamed in chunks for large lists.
+
+    Streaming sends the first rows while later ones are still being encoded,
+    instead of holding one large encoded body in memory.
+    """
+    if len(rows) <= STREAM_LIST_THRESHOLD:
+        return ojsonify({"count": len(rows), key: rows})
+
+    def generate():
+        yield b'{"count":%d,"%s":[' % (len(rows), key.encode())
+        for start in range(0, len(rows), STREAM_LIST_CHUNK_ROWS):
+            chunk = rows[start:start + STREAM_LIST_CHUNK_ROWS]
+            body = b','.join(json_bytes(row) for row in chunk)
+            yield body if start == 0 else b',' + body
+        yield b']}'
+
+    return Response(generate(), mimetype='application/json')
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag for a pre-serialized response body."""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+GZIP_MIN_SIZE = 512  # Below this the gzip header eats most of the saving
+
+
+def gzip_body(body: bytes) -> Optional[bytes]:
+    """Pre-compress a cached body, or None if it is too small to bother."""
+    if len(body) < GZIP_MIN_SIZE:
+        return None
+    return gzip.compress(body, compresslevel=9)
+
+
+def prebuilt_json_response(body: bytes, etag: str, max_age: int,
+                           gzipped: Optional[bytes] = None) -> Response:
+    """Return pre-serialized JSON (gzipped if available and accepted), or 304."""
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': f'public, max-age={max_age}'}
+    if gzipped is not None:
+        headers['Vary'] = 'Accept-Encoding'
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+
+    if gzipped is not None and request.accept_encodings['gzip']:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(gzipped, mimetype='application/json', headers=headers)
+    return Response(body, mimetype='application/json', headers=headers)
+
+
+def ttl_etag(ttl: float):
+    """
+    Cache a JSON view's 200 body for `ttl` seconds and answer If-None-Match with 304.
+
+    Responses the view marks Cache-Control: no-store pass through uncached.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            now = time.monotonic()
+            entry = _ttl_cache.get(request.path)
+            if entry is None or now >= entry[0]:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.cache_control.no_store:
+                    return response
+                body = response.get_data()
+                entry = (now + ttl, etag_for(body), body, gzip_body(body))
+                _ttl_cache[request.path] = entry
+            return prebuilt_json_response(entry[2], entry[1], max_age=int(ttl), gzipped=entry[3])
+        return wrapper
+    return decorator
+
+
+# Fan curves are constants, so the table is serialized once per process
+FAN_TABLE_MAX_AGE = 86400
+FAN_TABLE_JSON = json_bytes({
+    "fan_model": "AC Infinity Cloudline S6",
+    "table": fan_interpolator.get_speed_table(),
+})
+FAN_TABLE_ETAG = etag_for(FAN_TABLE_JSON)
+FAN_TABLE_GZIP = gzip_body(FAN_TABLE_JSON)
+
+
+class PigpioPWM:
+    """
+    RPi.GPIO.PWM-compatible wrapper around pigpiod.
+
+    pigpiod times the waveform with DMA, so unlike RPi.GPIO's software PWM
+    no Python thread toggles the pin; a duty change is one socket command.
+    """
+
+    def __init__(self, pi, pin: int, frequency: int):
+        self._pi = pi
+        self._pin = pin
+        pi.set_mode(pin, pigpio.OUTPUT)
+        pi.set_PWM_frequency(pin, frequency)
+        pi.set_PWM_range(pin, 100)  # Duty cycle in percent, like RPi.GPIO
+
+    def start(self, duty_cycle: float):
+        self.ChangeDutyCycle(duty_cycle)
+
+    def ChangeDutyCycle(self, duty_cycle: float):
+        self._pi.set_PWM_dutycycle(self._pin, int(round(duty_cycle)))
+
+    def stop(self):
+        self._pi.set_PWM_dutycycle(self._pin, 0)
+
 
 # --- GPIO Setup (only on Raspberry Pi) ---
 pwms = {}
 GPIO = None
+pigpio_pi = None
 
 try:
     import RPi.GPIO as GPIO
@@ -57,12 +303,21 @@ try:
     GPIO.setwarnings(False)
     GPIO.setmode(GPIO.BCM)
 
+    if PIGPIO_AVAILABLE:
+        pigpio_pi = pigpio.pi()
+        if not pigpio_pi.connected:
+            print("[WARN] pigpiod not running, using RPi.GPIO software PWM")
+            pigpio_pi = None
+
     for name, pin in FAN_PWM_PINS.items():
-        GPIO.setup(pin, GPIO.OUT)
-        pwm = GPIO.PWM(pin, PWM_FREQUENCY)
+        if pigpio_pi:
+            pwm = PigpioPWM(pigpio_pi, pin, PWM_FREQUENCY)
+        else:
+            GPIO.setup(pin, GPIO.OUT)
+            pwm = GPIO.PWM(pin, PWM_FREQUENCY)
         pwm.start(0)
         pwms[name] = pwm
-        print(f"[OK] {name} initialized on GPIO{pin}")
+        print(f"[OK] {name} initialized on GPIO{pin}{' (pigpio)' if pigpio_pi else ''}")
 
     RUNNING_ON_PI = True
 except (ImportError, RuntimeError) as e:
@@ -74,20 +329,173 @@ except (ImportError, RuntimeError) as e:
         print(f"[SIM] Would connect to WiFi: {ssid}")
         return True
 
+# PWM handles in one tuple for bulk updates (empty off-Pi)
+_pwm_list = tuple(pwms.values())
+
+
+class StatusStream:
+    """
+    Latest-value broadcast for the /api/stream SSE endpoint.
+
+    Publishers only bump a sequence number; each connected client wakes up,
+    builds a fresh snapshot and sends it. Bursts of events coalesce into one
+    message per client.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._event_type = None
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publish(self, event_type: str):
+        """Notify connected clients that status changed."""
+        with self._cond:
+            self._seq += 1
+            self._event_type = event_type
+            self._cond.notify_all()
+
+    def wait(self, last_seq: int, timeout: float):
+        """
+        Wait for an event newer than last_seq.
+
+        Returns:
+            Tuple of (seq, event_type), event_type is None on timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq != last_seq, timeout):
+                return last_seq, None
+            return self._seq, self._event_type
+
+
+status_stream = StatusStream()
+
+
+def set_fan(name: str, speed: int):
+    """Set a single fan's speed, updating the running sum and the PWM output."""
+    global _speed_sum, _fans_on_count
+    with _speed_lock:
+        previous = current_speeds[name]
+        _speed_sum += speed - previous
+        was_on = _fans_on_count > 0
+        _fans_on_count += (speed != 0) - (previous != 0)
+        current_speeds[name] = speed
+        _sync_fan_events(was_on)
+        _publish_speeds()
+
+    if RUNNING_ON_PI and name in pwms:
+        pwms[name].ChangeDutyCycle(speed)
+
+    status_stream.publish("fan")
+
+
+def set_all_fans(speed: int):
+    """Set every fan to the same speed at once (no stagger)."""
+    global _speed_sum, _fans_on_count
+    with _speed_lock:
+        was_on = _fans_on_count > 0
+        current_speeds.update(dict.fromkeys(FAN_PWM_PINS, speed))
+        _speed_sum = float(speed * FAN_COUNT)
+        _fans_on_count = FAN_COUNT if speed else 0
+        _sync_fan_events(was_on)
+        _publish_speeds()
+
+    for pwm in _pwm_list:
+        pwm.ChangeDutyCycle(speed)
+
+    status_stream.publish("fan")
+
+
+def _publish_speeds():
+    """Swap in a fresh speeds snapshot. Call with _speed_lock held."""
+    global _speeds_snapshot
+    # A single rebind, so readers see either the old or the new state, never a mix
+    _speeds_snapshot = (dict(current_speeds), _speed_sum * _INV_FAN_COUNT)
+
+
+def _sync_fan_events(was_on: bool):
+    """Flip the all-off events when the state changes. Call with _speed_lock held."""
+    global _fans_off_since
+    if _fans_on_count and not was_on:
+        fans_all_off.clear()
+        fans_running.set()
+    elif was_on and not _fans_on_count:
+        # Stamp before setting the event so waiters never see a stale time
+        _fans_off_since = time.monotonic()
+        fans_running.clear()
+        fans_all_off.set()
+
+
+def request_ramp(speed: int, staggered: bool = True):
+    """
+    Queue a change of all fans to `speed`, replacing any pending one.
+
+    Every fan change goes through the one worker, so a remote command can't
+    be overwritten by the tail of an in-flight staggered ramp.
+    """
+    global _ramp_target, _ramp_thread
+    with _ramp_cond:
+        _ramp_target = (speed, staggered)
+        if _ramp_thread is None:
+            _ramp_thread = threading.Thread(target=_ramp_worker, daemon=True)
+            _ramp_thread.start()
+        _ramp_cond.notify()
+
+
+def _ramp_worker():
+    """Apply ramp requests one at a time; a newer request supersedes the current ramp."""
+    global _ramp_target
+    delay_between = 5  # seconds between staggered starts
+
+    while True:
+        with _ramp_cond:
+            _ramp_cond.wait_for(lambda: _ramp_target is not None)
+            (speed, staggered), _ramp_target = _ramp_target, None
+
+        # One failed PWM write must not kill the only thread that applies speeds
+        try:
+            if not staggered:
+                set_all_fans(speed)
+                continue
+
+            print(f">> Setting all fans to {speed}%")
+            # Fan i starts i * delay_between after the ramp begins, whatever the
+            # earlier writes cost, so the schedule doesn't drift
+            start = time.monotonic()
+            for i, name in enumerate(FAN_PWM_PINS):
+                remaining = start + i * delay_between - time.monotonic()
+                with _ramp_cond:
+                    if _ramp_cond.wait_for(lambda: _ramp_target is not None, max(0.0, remaining)):
+                        print(f">> Ramp to {speed}% superseded")
+                        break
+                print(f"  {name} -> {speed}%")
+                set_fan(name, speed)
+        except Exception as e:
+            print(f"[ERR] Fan ramp to {speed}% failed: {e}")
+
 
 def get_average_pwm() -> float:
     """Get average PWM across all fans for telemetry."""
-    if not current_speeds:
-        return 0
-    return sum(current_speeds.values()) / len(current_speeds)
+    # Lock-free: writers swap the whole snapshot in one rebind
+    return _speeds_snapshot[1]
 
 
 # --- Telemetry Collector ---
+# The collector gets its own simulator (sharing the interpolator) so API
+# reads of sim_sensors never advance the state behind signed samples.
 telemetry_collector = TelemetryCollector(
     db_path="telemetry.db",
-    pwm_getter=get_average_pwm
+    pwm_getter=get_average_pwm,
+    sensors=SimulatedSensors(fan_interpolator),
 )
 
+# Push a status update to SSE clients on every sample and epoch
+telemetry_collector.add_callback(lambda sample: status_stream.publish("sample"))
+telemetry_collector.add_epoch_callback(lambda epoch: status_stream.publish("epoch"))
+
 # --- Verifier Client ---
 verifier_client = None
 if ENABLE_VERIFIER_SYNC:
@@ -97,24 +505,28 @@ if ENABLE_VERIFIER_SYNC:
         api_key=VERIFIER_API_KEY,
         buffer_db_path="sync_buffer.db",
         sync_interval_seconds=SYNC_INTERVAL_SECONDS,
+        batch_samples=VERIFIER_BATCH_SAMPLES,
     )
 
     # Wire up telemetry -> verifier streaming
     def on_sample_collected(sample: dict):
-        """Send each sample to verifier as it's collected."""
+        """Queue each sample for the verifier's batched sender."""
         if verifier_client:
-            verifier_client.send_sample(sample)
+            verifier_client.queue_sample(sample)
 
     def on_epoch_complete(epoch: dict):
-        """Submit completed epochs to verifier."""
+        """Queue completed epochs for the verifier's background sender."""
         if verifier_client:
-            verifier_client.send_epoch(epoch)
+            verifier_client.queue_epoch(epoch)
 
     telemetry_collector.add_callback(on_sample_collected)
-    telemetry_collector.set_epoch_callback(on_epoch_complete)
+    telemetry_collector.add_epoch_callback(on_epoch_complete)
 
     print(f"[VERIFIER] Streaming enabled to {VERIFIER_URL}")
 
+# --- Shared HTTP Session (one keep-alive pool for the backend host) ---
+http_session = get_shared_session(DEVICE_ID)
+
 # --- Registration / Commissioning ---
 commissioning_manager = CommissioningManager(db_path="commissioning.db")
 registration_client = RegistrationClient(
@@ -128,39 +540,97 @@ update_manager = UpdateManager()
 config_manager = ConfigManager()
 print(f"[OTA] Update manager ready")
 
+# --- mDNS Peer Discovery ---
+peer_browser = PeerBrowser()
+
+# --- Background Jobs (slow OTA work stays off the request threads) ---
+# UpdateManager has no locking of its own (shared download dir, backups,
+# restart timer), so update jobs run one at a time
+JOB_WORKERS = 1
+MAX_TRACKED_JOBS = 32
+
+_job_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_jobs = {}  # job_id -> Future, oldest first
+_jobs_lock = threading.Lock()
+
 
 # ============================================
 # ROUTES - Pages
 # ============================================
 
+def prerender_page(template: str) -> dict:
+    """Render a static template once and keep plain + gzip bodies."""
+    with app.app_context():
+        html = render_template(template).encode()
+    return {
+        "html": html,
+        "gzip": gzip.compress(html, compresslevel=9),
+        "etag": etag_for(html),
+    }
+
+
+PAGE_MAX_AGE = 300  # Pages only change with firmware, which also changes the ETag
+
+
+def prerendered_response(page: dict) -> Response:
+    """Serve a pre-rendered page, gzipped when the client accepts it."""
+    headers = {
+        'ETag': f'"{page["etag"]}"',
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': f'public, max-age={PAGE_MAX_AGE}',
+    }
+    if request.if_none_match.contains(page["etag"]):
+        return Response(status=304, headers=headers)
+
+    if request.accept_encodings['gzip']:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(page["gzip"], mimetype='text/html', headers=headers)
+    return Response(page["html"], mimetype='text/html', headers=headers)
+
+
+# Pages have no template variables, so render them once at startup
+INDEX_PAGE = prerender_page('index.html')
+DASHBOARD_PAGE = prerender_page('fan.html')
+
+
 @app.route('/')
 def index():
     """Landing page."""
-    return render_template('index.html')
+    return prerendered_response(INDEX_PAGE)
 
 
 @app.route('/dashboard')
 def dashboard():
     """Fan control dashboard."""
-    return render_template('fan.html')
+    return prerendered_response(DASHBOARD_PAGE)
 
 
 # ============================================
 # ROUTES - Device Info
 # ============================================
 
+# Everything except telemetry_active is fixed for the life of the process
+_DEVICE_INFO_STATIC = {
+    "device_id": DEVICE_ID,
+    "firmware_version": FIRMWARE_VERSION,
+    "simulation_mode": SIMULATION_MODE,
+    "running_on_pi": RUNNING_ON_PI,
+    "fan_count": len(FAN_PWM_PINS),
+    "sample_interval_seconds": SAMPLE_INTERVAL_SECONDS,
+}
+
+# The only dynamic field is a bool, so both possible bodies are built up front
+_DEVICE_INFO_BODIES = {
+    active: json_bytes({**_DEVICE_INFO_STATIC, "telemetry_active": active})
+    for active in (False, True)
+}
+
+
 @app.route('/api/info', methods=['GET'])
 def device_info():
     """Get device information and status."""
-    return jsonify({
-        "device_id": DEVICE_ID,
-        "firmware_version": FIRMWARE_VERSION,
-        "simulation_mode": SIMULATION_MODE,
-        "running_on_pi": RUNNING_ON_PI,
-        "fan_count": len(FAN_PWM_PINS),
-        "sample_interval_seconds": SAMPLE_INTERVAL_SECONDS,
-        "telemetry_active": telemetry_collector._running,
-    })
+    body = _DEVICE_INFO_BODIES[bool(telemetry_collector._running)]
+    return Response(body, mimetype='application/json')
 
 
 # ============================================
@@ -175,30 +645,19 @@ def set_fan_speed():
     Body: {"speed": 0-100}
     """
     try:
-        data = request.get_json()
+        data = json_body()
         speed = int(data.get('speed', 0))
 
         if speed < 0 or speed > 100:
-            return jsonify({"error": "Speed must be between 0 and 100"}), 400
-
-        def ramp():
-            delay_between = 5  # seconds between staggered starts
-            print(f">> Setting all fans to {speed}%")
-
-            for i, (name, _) in enumerate(FAN_PWM_PINS.items()):
-                time.sleep(i * delay_between)
-                print(f"  {name} -> {speed}%")
-                current_speeds[name] = speed
+            return ojsonify({"error": "Speed must be between 0 and 100"}), 400
 
-                if RUNNING_ON_PI and name in pwms:
-                    pwms[name].ChangeDutyCycle(speed)
-
-        threading.Thread(target=ramp).start()
+        # Handed to the single ramp worker; stacked requests keep only the newest
+        request_ramp(speed)
 
         # Get interpolated metrics for response
         metrics = fan_interpolator.get_all_metrics(speed)
 
-        return jsonify({
+        return ojsonify({
             "status": f"All fans ramping to {speed}%",
             "target_speed": speed,
             "estimated_cfm": metrics["cfm"],
@@ -208,22 +667,101 @@ def set_fan_speed():
 
     except Exception as e:
         print(f"[ERR] Fan control error: {e}")
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 
 @app.route('/api/fan/status', methods=['GET'])
 def fan_status():
     """Get current fan status with interpolated metrics."""
-    avg_pwm = get_average_pwm()
+    speeds, avg_pwm = _speeds_snapshot
     metrics = fan_interpolator.get_all_metrics(avg_pwm)
 
-    return jsonify({
-        "fans": current_speeds,
+    return ojsonify({
+        "fans": speeds,
         "average_pwm": avg_pwm,
         "estimated": metrics,
     })
 
 
+# ============================================
+# ROUTES - Live Status Stream
+# ============================================
+
+STREAM_MIN_INTERVAL_SECONDS = 0.25  # Debounce: at most 4 messages/sec per client
+STREAM_KEEPALIVE_SECONDS = 15
+# Each stream pins a waitress worker for the life of the connection, so cap
+# them and leave WAITRESS_THREADS - STREAM_MAX_CLIENTS for normal routes.
+STREAM_MAX_CLIENTS = 2
+STREAM_RETRY_MS = 10000
+
+_stream_slots = threading.BoundedSemaphore(STREAM_MAX_CLIENTS)
+
+
+def _status_snapshot() -> dict:
+    """Combined fan, telemetry and sync status (what dashboards would poll)."""
+    speeds, avg_pwm = _speeds_snapshot
+    return {
+        "fans": speeds,
+        "average_pwm": avg_pwm,
+        "telemetry": {
+            "running": telemetry_collector._running,
+            "current_epoch_samples": len(telemetry_collector._current_epoch_samples),
+        },
+        "sync": verifier_client.get_status().to_dict() if verifier_client else None,
+    }
+
+
+def _sse_message(event_type: str, data: dict) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event_type}\ndata: {json_bytes(data).decode()}\n\n"
+
+
+@app.route('/api/stream', methods=['GET'])
+def stream_status():
+    """
+    Stream status changes as Server-Sent Events.
+
+    Replaces polling /api/fan/status, /api/telemetry/status and
+    /api/sync/status. Sends a snapshot on connect, then on every fan
+    change or telemetry sample. Returns 503 with an SSE retry hint when
+    STREAM_MAX_CLIENTS streams are already open.
+    """
+    if not _stream_slots.acquire(blocking=False):
+        return Response(
+            f"retry: {STREAM_RETRY_MS}\n\n",
+            status=503,
+            mimetype='text/event-stream',
+            headers={'Retry-After': str(STREAM_RETRY_MS // 1000)}
+        )
+
+    def generate():
+        seq = status_stream.seq
+        yield _sse_message("status", _status_snapshot())
+
+        while True:
+            seq, event_type = status_stream.wait(seq, STREAM_KEEPALIVE_SECONDS)
+            if event_type is None:
+                yield ": keepalive\n\n"
+                continue
+
+            yield _sse_message(event_type, _status_snapshot())
+            time.sleep(STREAM_MIN_INTERVAL_SECONDS)
+
+    try:
+        response = Response(
+            generate(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache'},
+        )
+    except Exception:
+        _stream_slots.release()
+        raise
+    # Released when the server closes the response, even if the client
+    # disconnects before the generator starts.
+    response.call_on_close(_stream_slots.release)
+    return response
+
+
 # ============================================
 # ROUTES - Telemetry
 # ============================================
@@ -232,26 +770,26 @@ def fan_status():
 def start_telemetry():
     """Start telemetry collection."""
     if telemetry_collector._running:
-        return jsonify({"status": "already running"})
+        return ojsonify({"status": "already running"})
 
     telemetry_collector.start()
-    return jsonify({"status": "started"})
+    return ojsonify({"status": "started"})
 
 
 @app.route('/api/telemetry/stop', methods=['POST'])
 def stop_telemetry():
     """Stop telemetry collection."""
     if not telemetry_collector._running:
-        return jsonify({"status": "not running"})
+        return ojsonify({"status": "not running"})
 
     telemetry_collector.stop()
-    return jsonify({"status": "stopped"})
+    return ojsonify({"status": "stopped"})
 
 
 @app.route('/api/telemetry/status', methods=['GET'])
 def telemetry_status():
     """Get telemetry collection status."""
-    return jsonify({
+    return ojsonify({
         "running": telemetry_collector._running,
         "simulation_mode": SIMULATION_MODE,
         "sample_interval": SAMPLE_INTERVAL_SECONDS,
@@ -264,10 +802,7 @@ def get_samples():
     """Get recent telemetry samples."""
     limit = request.args.get('limit', 100, type=int)
     samples = telemetry_collector.get_recent_samples(limit)
-    return jsonify({
-        "count": len(samples),
-        "samples": samples,
-    })
+    return json_list_response("samples", samples)
 
 
 @app.route('/api/telemetry/epochs', methods=['GET'])
@@ -275,19 +810,14 @@ def get_epochs():
     """Get recent epochs."""
     limit = request.args.get('limit', 24, type=int)
     epochs = telemetry_collector.get_recent_epochs(limit)
-    return jsonify({
-        "count": len(epochs),
-        "epochs": epochs,
-    })
+    return json_list_response("epochs", epochs)
 
 
 @app.route('/api/telemetry/current', methods=['GET'])
 def get_current_reading():
     """Get a single current reading (does not store)."""
-    from sensors import SimulatedSensors
-    sensors = SimulatedSensors(fan_interpolator)
-    reading = sensors.read_all(get_average_pwm())
-    return jsonify(reading)
+    reading = sim_sensors.read_all(get_average_pwm())
+    return ojsonify(reading)
 
 
 # ============================================
@@ -304,24 +834,28 @@ if RUNNING_ON_PI:
     except Exception as e:
         print(f"[WIFI] Provisioning not available: {e}")
 
+# Background connection attempt (at most one at a time)
+_wifi_connect_thread = None
+_wifi_connect_lock = threading.Lock()
+
 
 @app.route('/api/wifi/status', methods=['GET'])
 def wifi_status():
     """Get current WiFi status."""
     if wifi_provisioner is None:
-        return jsonify({
+        return ojsonify({
             "error": "WiFi provisioning not available (not on Pi)",
             "simulation": True
         })
 
-    return jsonify(wifi_provisioner.get_status())
+    return ojsonify(wifi_provisioner.get_status())
 
 
 @app.route('/api/wifi/scan', methods=['GET'])
 def wifi_scan():
     """Scan for available WiFi networks."""
     if wifi_provisioner is None:
-        return jsonify({
+        return ojsonify({
             "networks": [
                 {"ssid": "SimulatedNetwork", "signal": "80", "security": "WPA2"}
             ],
@@ -329,7 +863,7 @@ def wifi_scan():
         })
 
     networks = wifi_provisioner.scan_networks()
-    return jsonify({
+    return ojsonify({
         "count": len(networks),
         "networks": networks
     })
@@ -338,31 +872,42 @@ def wifi_scan():
 @app.route('/api/wifi/connect', methods=['POST'])
 def wifi_connect():
     """Start WiFi connection attempt (non-blocking, AP stays active on uap0)."""
-    data = request.get_json() or {}
+    global _wifi_connect_thread
+
+    data = json_body() or {}
     ssid = data.get('ssid') or request.form.get('ssid')
     password = data.get('password') or request.form.get('password')
 
     if not ssid or not password:
-        return jsonify({'error': 'SSID and password required'}), 400
+        return ojsonify({'error': 'SSID and password required'}), 400
 
     if wifi_provisioner is None:
-        return jsonify({
+        return ojsonify({
             'status': 'connected',
             'message': 'Simulated connection (not on Pi)',
             'simulation': True
         })
 
     # Start connection in background thread (AP stays active on uap0)
-    import threading
     def _background_connect():
         success, message = wifi_provisioner.connect_to_wifi(ssid, password)
         if success:
             # Schedule AP shutdown after 60 seconds
             wifi_provisioner.schedule_ap_shutdown(delay_seconds=60)
 
-    threading.Thread(target=_background_connect, daemon=True).start()
+    # nmcli attempts can't be interrupted, so don't start a second one on top.
+    # Check and start under the lock so two concurrent requests can't both pass.
+    with _wifi_connect_lock:
+        if _wifi_connect_thread is not None and _wifi_connect_thread.is_alive():
+            return ojsonify({
+                'status': 'connecting',
+                'error': 'A connection attempt is already in progress',
+            }), 409
 
-    return jsonify({
+        _wifi_connect_thread = threading.Thread(target=_background_connect, daemon=True)
+        _wifi_connect_thread.start()
+
+    return ojsonify({
         'status': 'connecting',
         'message': f'Connecting to {ssid}...',
         'ssid': ssid,
@@ -373,22 +918,22 @@ def wifi_connect():
 def wifi_connect_status():
     """Poll connection attempt status (used by frontend during provisioning)."""
     if wifi_provisioner is None:
-        return jsonify({
+        return ojsonify({
             'state': 'connected',
             'simulation': True,
         })
 
-    return jsonify(wifi_provisioner.get_connection_state())
+    return ojsonify(wifi_provisioner.get_connection_state())
 
 
 @app.route('/api/wifi/ap/start', methods=['POST'])
 def wifi_ap_start():
     """Start Access Point (hotspot) mode."""
     if wifi_provisioner is None:
-        return jsonify({'error': 'WiFi provisioning not available'}), 400
+        return ojsonify({'error': 'WiFi provisioning not available'}), 400
 
     success, message = wifi_provisioner.start_ap_mode()
-    return jsonify({
+    return ojsonify({
         'success': success,
         'message': message,
         'ap_ssid': wifi_provisioner.ap_ssid,
@@ -400,10 +945,10 @@ def wifi_ap_start():
 def wifi_ap_stop():
     """Stop Access Point mode."""
     if wifi_provisioner is None:
-        return jsonify({'error': 'WiFi provisioning not available'}), 400
+        return ojsonify({'error': 'WiFi provisioning not available'}), 400
 
     success, message = wifi_provisioner.stop_ap_mode()
-    return jsonify({
+    return ojsonify({
         'success': success,
         'message': message
     })
@@ -416,19 +961,18 @@ def connect_wifi():
     password = request.form.get('password') or (request.json or {}).get('password')
 
     if not ssid or not password:
-        return jsonify({'error': 'SSID and password required'}), 400
+        return ojsonify({'error': 'SSID and password required'}), 400
 
     if wifi_provisioner:
         success, message = wifi_provisioner.connect_to_wifi(ssid, password)
     else:
-        from wifi_config import apply_wifi_settings
         success = apply_wifi_settings(ssid, password)
         message = "Connected" if success else "Failed"
 
     if success:
-        return jsonify({'message': f'WiFi connected to {ssid}', 'success': True}), 200
+        return ojsonify({'message': f'WiFi connected to {ssid}', 'success': True}), 200
     else:
-        return jsonify({'error': message, 'success': False}), 500
+        return ojsonify({'error': message, 'success': False}), 500
 
 
 # ============================================
@@ -436,43 +980,47 @@ def connect_wifi():
 # ============================================
 
 @app.route('/api/identity', methods=['GET'])
+@ttl_etag(ttl=IDENTITY_CACHE_SECONDS)
 def get_identity():
     """Get device cryptographic identity."""
     identity_info = telemetry_collector.get_device_identity_info()
     if identity_info:
-        return jsonify({
+        return ojsonify({
             "status": "ok",
             "signing_enabled": True,
             **identity_info,
         })
     else:
-        return jsonify({
+        # Not cached, so the dashboard sees the identity as soon as it's provisioned
+        response = ojsonify({
             "status": "unavailable",
             "signing_enabled": False,
             "message": "Cryptographic identity not available",
         })
+        response.cache_control.no_store = True
+        return response
 
 
 @app.route('/api/telemetry/verify', methods=['POST'])
 def verify_sample():
     """Verify a signed telemetry sample."""
+    if not CRYPTO_AVAILABLE:
+        return ojsonify({"error": "Crypto module not available"}), 500
+
     try:
-        from crypto import verify_signature
-        sample = request.get_json()
+        sample = json_body()
 
         if '_signing' not in sample:
-            return jsonify({"valid": False, "message": "No signature present"}), 400
+            return ojsonify({"valid": False, "message": "No signature present"}), 400
 
         is_valid, message = verify_signature(sample)
-        return jsonify({
+        return ojsonify({
             "valid": is_valid,
             "message": message,
             "payload_hash": sample['_signing'].get('payload_hash'),
         })
-    except ImportError:
-        return jsonify({"error": "Crypto module not available"}), 500
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 
 # ============================================
@@ -483,13 +1031,13 @@ def verify_sample():
 def sync_status():
     """Get verifier sync status."""
     if verifier_client is None:
-        return jsonify({
+        return ojsonify({
             "enabled": False,
             "message": "Verifier sync is disabled",
         })
 
     status = verifier_client.get_status()
-    return jsonify({
+    return ojsonify({
         "enabled": True,
         "verifier_url": VERIFIER_URL,
         **status.to_dict(),
@@ -500,10 +1048,10 @@ def sync_status():
 def force_sync():
     """Force an immediate sync attempt."""
     if verifier_client is None:
-        return jsonify({"error": "Verifier sync is disabled"}), 400
+        return ojsonify({"error": "Verifier sync is disabled"}), 400
 
     result = verifier_client.force_sync()
-    return jsonify({
+    return ojsonify({
         "status": "sync attempted",
         **result,
     })
@@ -513,11 +1061,11 @@ def force_sync():
 def get_verifications():
     """Get recent verification responses from verifier."""
     if verifier_client is None:
-        return jsonify({"error": "Verifier sync is disabled"}), 400
+        return ojsonify({"error": "Verifier sync is disabled"}), 400
 
     limit = request.args.get('limit', 10, type=int)
     verifications = verifier_client.get_verifications(limit)
-    return jsonify({
+    return ojsonify({
         "count": len(verifications),
         "verifications": verifications,
     })
@@ -532,25 +1080,26 @@ def security_status():
     """Get anomaly detection status."""
     status = telemetry_collector.get_anomaly_status()
     if status is None:
-        return jsonify({
+        return ojsonify({
             "enabled": False,
             "message": "Anomaly detection is disabled",
         })
 
-    return jsonify({
+    return ojsonify({
         "enabled": True,
         **status,
     })
 
 
 @app.route('/api/security/baselines', methods=['GET'])
+@ttl_etag(ttl=STATUS_CACHE_SECONDS)
 def security_baselines():
     """Get current baseline statistics for all sensors."""
     baselines = telemetry_collector.get_anomaly_baselines()
     if baselines is None:
-        return jsonify({"error": "Anomaly detection is disabled"}), 400
+        return ojsonify({"error": "Anomaly detection is disabled"}), 400
 
-    return jsonify({
+    return ojsonify({
         "fields": baselines,
     })
 
@@ -560,7 +1109,7 @@ def get_anomalies():
     """Get recent anomalies detected."""
     limit = request.args.get('limit', 50, type=int)
     anomalies = telemetry_collector.get_recent_anomalies(limit)
-    return jsonify({
+    return ojsonify({
         "count": len(anomalies),
         "anomalies": anomalies,
     })
@@ -573,28 +1122,47 @@ def get_anomalies():
 @app.route('/api/registration/status', methods=['GET'])
 def registration_status():
     """Get commissioning/registration status."""
-    return jsonify(commissioning_manager.get_status())
+    return ojsonify(commissioning_manager.get_status())
+
+
+def _ensure_manifest(now: float):
+    """Generate the manifest body once per MANIFEST_CACHE_SECONDS."""
+    if _manifest_cache["body"] is not None and now < _manifest_cache["expires_at"]:
+        return
+    with _manifest_lock:
+        # Another request may have rebuilt it while we waited
+        if _manifest_cache["body"] is not None and now < _manifest_cache["expires_at"]:
+            return
+        body = json_bytes(HardwareManifest().generate())
+        _manifest_cache["etag"] = etag_for(body)
+        _manifest_cache["gzip"] = gzip_body(body)
+        _manifest_cache["body"] = body
+        _manifest_cache["expires_at"] = now + MANIFEST_CACHE_SECONDS
 
 
 @app.route('/api/registration/manifest', methods=['GET'])
 def get_manifest():
-    """Get hardware manifest."""
-    manifest_gen = HardwareManifest()
-    manifest = manifest_gen.generate()
-    return jsonify(manifest)
+    """Get hardware manifest (cached, it only changes with hardware/identity)."""
+    now = time.monotonic()
+    _ensure_manifest(now)
+
+    return prebuilt_json_response(
+        _manifest_cache["body"],
+        _manifest_cache["etag"],
+        max_age=int(_manifest_cache["expires_at"] - now),
+        gzipped=_manifest_cache["gzip"],
+    )
 
 
 @app.route('/api/registration/calibrate', methods=['POST'])
 def start_calibration():
     """Start baseline calibration."""
-    data = request.get_json() or {}
+    data = json_body() or {}
     duration = data.get('duration_minutes', CALIBRATION_DURATION_MINUTES)
 
     # Create sensor reader that uses current telemetry setup
     def sensor_reader():
-        from sensors import SimulatedSensors
-        sensors = SimulatedSensors(fan_interpolator)
-        return sensors.read_all(get_average_pwm())
+        return sim_sensors.read_all(get_average_pwm())
 
     success = commissioning_manager.start_calibration(
         duration_minutes=duration,
@@ -602,12 +1170,12 @@ def start_calibration():
     )
 
     if success:
-        return jsonify({
+        return ojsonify({
             "status": "calibration_started",
             "duration_minutes": duration,
         })
     else:
-        return jsonify({
+        return ojsonify({
             "error": "Could not start calibration",
             "current_state": commissioning_manager.state.value,
         }), 400
@@ -617,24 +1185,28 @@ def start_calibration():
 def stop_calibration():
     """Stop calibration early."""
     commissioning_manager.stop_calibration()
-    return jsonify({
+    return ojsonify({
         "status": "calibration_stopped",
         "state": commissioning_manager.state.value,
     })
 
 
+REGISTRATION_FIELDS = ('wallet_address', 'salon_name', 'location', 'email')
+_REGISTRATION_FIELD_SET = frozenset(REGISTRATION_FIELDS)
+
+
 @app.route('/api/registration/register', methods=['POST'])
 def register_device():
     """Submit device registration to backend."""
-    data = request.get_json()
+    data = json_body()
 
     if not data:
-        return jsonify({"error": "Request body required"}), 400
+        return ojsonify({"error": "Request body required"}), 400
 
-    required_fields = ['wallet_address', 'salon_name', 'location', 'email']
-    missing = [f for f in required_fields if f not in data]
-    if missing:
-        return jsonify({"error": f"Missing required fields: {missing}"}), 400
+    if not _REGISTRATION_FIELD_SET.issubset(data):
+        # Report in declared order (only on the error path)
+        missing = [f for f in REGISTRATION_FIELDS if f not in data]
+        return ojsonify({"error": f"Missing required fields: {missing}"}), 400
 
     success = commissioning_manager.register(
         wallet_address=data['wallet_address'],
@@ -650,13 +1222,13 @@ def register_device():
     )
 
     if success:
-        return jsonify({
+        return ojsonify({
             "status": "registration_submitted",
             "registration_id": commissioning_manager._registration_id,
             "message": "Registration submitted. Awaiting admin approval.",
         })
     else:
-        return jsonify({
+        return ojsonify({
             "error": "Registration failed",
             "state": commissioning_manager.state.value,
         }), 500
@@ -667,7 +1239,7 @@ def check_approval():
     """Check if registration has been approved."""
     is_approved = commissioning_manager.check_approval(registration_client)
 
-    return jsonify({
+    return ojsonify({
         "approved": is_approved,
         "state": commissioning_manager.state.value,
         "nft_binding": commissioning_manager.nft_binding,
@@ -678,7 +1250,7 @@ def check_approval():
 def reset_registration():
     """Reset commissioning state (for re-registration)."""
     commissioning_manager.reset()
-    return jsonify({
+    return ojsonify({
         "status": "reset",
         "state": commissioning_manager.state.value,
     })
@@ -688,7 +1260,7 @@ def reset_registration():
 def ping_backend():
     """Check if backend is reachable."""
     is_online = registration_client.ping()
-    return jsonify({
+    return ojsonify({
         "backend_url": BACKEND_URL,
         "online": is_online,
     })
@@ -701,24 +1273,111 @@ def ping_backend():
 @app.route('/api/sensors/fan-table', methods=['GET'])
 def get_fan_table():
     """Get full fan performance interpolation table."""
-    table = fan_interpolator.get_speed_table()
-    return jsonify({
-        "fan_model": "AC Infinity Cloudline S6",
-        "table": table,
-    })
+    return prebuilt_json_response(
+        FAN_TABLE_JSON, FAN_TABLE_ETAG, max_age=FAN_TABLE_MAX_AGE, gzipped=FAN_TABLE_GZIP
+    )
 
 
 # ============================================
 # ROUTES - OTA Updates
 # ============================================
 
+def wait_requested() -> bool:
+    """True if the caller asked for the old blocking response with ?wait=1."""
+    return request.args.get('wait', '').lower() in ('1', 'true', 'yes')
+
+
+def start_job(fn, *args, **kwargs):
+    """
+    Queue `fn` on the job pool unless an update job is still running.
+
+    Returns:
+        (job_id, Future), or None if another job is in flight
+    """
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        if any(not future.done() for future in _jobs.values()):
+            return None
+
+        # Forget the oldest finished jobs once the table is full
+        for old_id in list(_jobs):
+            if len(_jobs) < MAX_TRACKED_JOBS:
+                break
+            if _jobs[old_id].done():
+                del _jobs[old_id]
+        future = _jobs[job_id] = _job_pool.submit(fn, *args, **kwargs)
+    return job_id, future
+
+
+def job_conflict_response():
+    """409 for update requests made while another update job is running."""
+    return ojsonify({
+        "error": "Another update operation is in progress",
+        "status": update_manager.status.value,
+    }), 409
+
+
+def submit_job(fn, *args, **kwargs):
+    """
+    Run `fn` on the job pool and return (json, 202) with its job id.
+
+    Returns 409 if an update job is still running, so double-submits from
+    a dashboard can't start two UpdateManager operations.
+
+    With ?wait=1, blocks until `fn` finishes and returns its result directly
+    as {success, message, status}, as these routes did before they became
+    background jobs.
+    """
+    started = start_job(fn, *args, **kwargs)
+    if started is None:
+        return job_conflict_response()
+
+    job_id, future = started
+    if wait_requested():
+        success, message = future.result()
+        return ojsonify({
+            "success": success,
+            "message": message,
+            "status": update_manager.status.value,
+        })
+
+    return ojsonify({
+        "job_id": job_id,
+        "status": update_manager.status.value,
+    }), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll a background job started by one of the update routes."""
+    with _jobs_lock:
+        future = _jobs.get(job_id)
+    if future is None:
+        return ojsonify({"error": "Unknown job"}), 404
+
+    if not future.done():
+        return ojsonify({"done": False, "status": update_manager.status.value})
+
+    error = future.exception()
+    if error is not None:
+        return ojsonify({"done": True, "success": False, "message": str(error)})
+
+    success, message = future.result()
+    return ojsonify({
+        "done": True,
+        "success": success,
+        "message": message,
+        "status": update_manager.status.value,
+    })
+
+
 @app.route('/api/system/status', methods=['GET'])
+@ttl_etag(ttl=STATUS_CACHE_SECONDS)
 def system_status():
     """Get overall system status including update info."""
-    import socket
-    return jsonify({
+    return ojsonify({
         "device_id": DEVICE_ID,
-        "hostname": socket.gethostname(),
+        "hostname": HOSTNAME,
         "firmware_version": FIRMWARE_VERSION,
         "simulation_mode": SIMULATION_MODE,
         "update_status": update_manager.get_status(),
@@ -729,23 +1388,12 @@ def system_status():
 @app.route('/api/network/discover', methods=['GET'])
 def discover_devices():
     """Discover BeautiFi devices via mDNS (local) and backend (remote)."""
-    import subprocess
-    import socket
-    import requests
-
     devices = []
-    my_hostname = socket.gethostname()
+    my_hostname = HOSTNAME
     seen_device_ids = set()
 
     # Get my IP
-    my_ip = None
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(('8.8.8.8', 80))
-        my_ip = s.getsockname()[0]
-        s.close()
-    except:
-        pass
+    my_ip = get_local_ip()
 
     # Add self first
     devices.append({
@@ -761,50 +1409,39 @@ def discover_devices():
     })
     seen_device_ids.add(DEVICE_ID)
 
-    # Try mDNS discovery (works on local network without client isolation)
-    try:
-        result = subprocess.run(
-            ['avahi-browse', '-t', '-r', '-p', '_beautifi._tcp'],
-            capture_output=True, text=True, timeout=5
-        )
-
-        seen_hosts = set()
-        for line in result.stdout.split('\n'):
-            if line.startswith('='):
-                parts = line.split(';')
-                if len(parts) >= 9:
-                    hostname = parts[6].replace('.local', '')
-                    ip = parts[7]
-                    port = parts[8]
-
-                    # Skip IPv6 and duplicates
-                    if ':' in ip or hostname in seen_hosts or hostname == my_hostname:
-                        continue
-                    seen_hosts.add(hostname)
-
-                    devices.append({
-                        'hostname': hostname,
-                        'device_id': None,
-                        'ip': ip,
-                        'port': port,
-                        'url': f'http://{ip}:{port}',
-                        'dashboard': f'http://{ip}:{port}/dashboard',
-                        'is_self': False,
-                        'source': 'mdns',
-                        'is_registered': None
-                    })
-    except:
-        pass
+    # mDNS peers (works on local network without client isolation)
+    seen_hosts = set()
+    for peer in peer_browser.get_peers():
+        hostname = peer['hostname']
+        ip = peer['ip']
+        port = peer['port']
+
+        # Skip self and duplicates
+        if hostname in seen_hosts or hostname == my_hostname:
+            continue
+        seen_hosts.add(hostname)
+
+        devices.append({
+            'hostname': hostname,
+            'device_id': None,
+            'ip': ip,
+            'port': port,
+            'url': f'http://{ip}:{port}',
+            'dashboard': f'http://{ip}:{port}/dashboard',
+            'is_self': False,
+            'source': 'mdns',
+            'is_registered': None
+        })
 
     # Query backend for all online devices (works across networks)
     try:
-        resp = requests.get(
-            'https://salon-safe-backend.onrender.com/api/devices/online/all',
+        resp = http_session.get(
+            f'{BACKEND_URL}/api/devices/online/all',
             params={'minutes': 60},
             timeout=10
         )
         if resp.status_code == 200:
-            data = resp.json()
+            data = json_loads(resp.content)
             for dev in data.get('devices', []):
                 device_id = dev.get('device_id')
                 if device_id and device_id not in seen_device_ids:
@@ -825,7 +1462,7 @@ def discover_devices():
     except Exception as e:
         print(f"[DISCOVER] Backend query failed: {e}")
 
-    return jsonify({
+    return ojsonify({
         'devices': devices,
         'count': len(devices)
     })
@@ -844,73 +1481,65 @@ def check_updates():
         result["available_version"] = manifest.version
         result["changelog"] = manifest.changelog
         result["release_date"] = manifest.release_date
-    return jsonify(result)
+    return ojsonify(result)
 
 
 @app.route('/api/system/update/download', methods=['POST'])
 def download_update():
-    """Download available firmware update."""
+    """Download available firmware update (background job, poll /api/jobs/<id>)."""
     if update_manager.status.value not in ["available", "idle"]:
-        return jsonify({
+        return ojsonify({
             "error": f"Cannot download in state: {update_manager.status.value}"
         }), 400
 
-    # Check first
-    available, manifest, msg = update_manager.check_for_updates()
-    if not available:
-        return jsonify({"error": msg}), 400
+    if wait_requested():
+        available, manifest, msg = update_manager.check_for_updates()
+        if not available:
+            return ojsonify({"error": msg}), 400
+        return submit_job(update_manager.download_update, manifest)
 
-    success, message = update_manager.download_update(manifest)
-    return jsonify({
-        "success": success,
-        "message": message,
-        "status": update_manager.status.value,
-    })
+    def _check_and_download():
+        available, manifest, msg = update_manager.check_for_updates()
+        if not available:
+            return False, msg
+        return update_manager.download_update(manifest)
+
+    return submit_job(_check_and_download)
 
 
 @app.route('/api/system/update/install', methods=['POST'])
 def install_update():
-    """Install downloaded firmware update."""
-    data = request.get_json() or {}
+    """Install downloaded firmware update (background job, poll /api/jobs/<id>)."""
+    data = json_body() or {}
     auto_backup = data.get("auto_backup", True)
     auto_restart = data.get("auto_restart", False)
 
-    success, message = update_manager.install_update(
+    return submit_job(
+        update_manager.install_update,
         auto_backup=auto_backup,
         auto_restart=auto_restart,
     )
 
-    return jsonify({
-        "success": success,
-        "message": message,
-        "status": update_manager.status.value,
-    })
-
 
 @app.route('/api/system/update/perform', methods=['POST'])
 def perform_update():
-    """Perform full update: check, download, install."""
-    data = request.get_json() or {}
+    """Perform full update: check, download, install (background job)."""
+    data = json_body() or {}
     auto_backup = data.get("auto_backup", True)
     auto_restart = data.get("auto_restart", False)
 
-    success, message = update_manager.perform_update(
+    return submit_job(
+        update_manager.perform_update,
         auto_backup=auto_backup,
         auto_restart=auto_restart,
     )
 
-    return jsonify({
-        "success": success,
-        "message": message,
-        "status": update_manager.status.value,
-    })
-
 
 @app.route('/api/system/backups', methods=['GET'])
 def list_backups():
     """List available firmware backups."""
     backups = update_manager.list_backups()
-    return jsonify({
+    return ojsonify({
         "count": len(backups),
         "backups": backups,
     })
@@ -919,11 +1548,17 @@ def list_backups():
 @app.route('/api/system/rollback', methods=['POST'])
 def rollback_firmware():
     """Rollback to a previous firmware version."""
-    data = request.get_json() or {}
+    data = json_body() or {}
     backup_path = data.get("backup_path")
 
-    success, message = update_manager.rollback(backup_path)
-    return jsonify({
+    # Runs on the job pool so it can't overlap a download or install,
+    # but still answers synchronously
+    started = start_job(update_manager.rollback, backup_path)
+    if started is None:
+        return job_conflict_response()
+
+    success, message = started[1].result()
+    return ojsonify({
         "success": success,
         "message": message,
     })
@@ -936,7 +1571,7 @@ def rollback_firmware():
 @app.route('/api/system/config', methods=['GET'])
 def get_config():
     """Get current device configuration."""
-    return jsonify({
+    return ojsonify({
         "config": config_manager.get_all(),
         "status": config_manager.get_status(),
     })
@@ -945,9 +1580,9 @@ def get_config():
 @app.route('/api/system/config', methods=['POST'])
 def update_config():
     """Update device configuration."""
-    data = request.get_json()
+    data = json_body()
     if not data:
-        return jsonify({"error": "No configuration data provided"}), 400
+        return ojsonify({"error": "No configuration data provided"}), 400
 
     # Check for signature (for remote updates)
     signature = data.pop("_signature", None)
@@ -957,9 +1592,34 @@ def update_config():
     else:
         success, results = config_manager.set_multiple(data, source="api")
 
-    return jsonify({
+    return ojsonify({
+        "success": success,
+        "results": results,
+    })
+
+
+@app.route('/api/system/config/batch', methods=['PUT'])
+def set_config_batch():
+    """
+    Set several configuration values in one request.
+
+    Body: {"updates": [{"key": ..., "value": ...}, ...]}
+    """
+    data = json_body()
+    updates = (data or {}).get("updates")
+    if not isinstance(updates, list):
+        return ojsonify({"error": "updates list required"}), 400
+
+    try:
+        values = {item["key"]: item["value"] for item in updates}
+    except (KeyError, TypeError):
+        return ojsonify({"error": "Each update needs a key and a value"}), 400
+
+    success, results = config_manager.set_multiple(values, source="api")
+    return ojsonify({
         "success": success,
         "results": results,
+        "config": config_manager.get_all(),
     })
 
 
@@ -968,9 +1628,9 @@ def get_config_value(key):
     """Get a specific configuration value."""
     value = config_manager.get(key)
     if value is None and key not in config_manager.ALLOWED_FIELDS:
-        return jsonify({"error": f"Unknown configuration key: {key}"}), 404
+        return ojsonify({"error": f"Unknown configuration key: {key}"}), 404
 
-    return jsonify({
+    return ojsonify({
         "key": key,
         "value": value,
     })
@@ -979,12 +1639,12 @@ def get_config_value(key):
 @app.route('/api/system/config/<key>', methods=['PUT'])
 def set_config_value(key):
     """Set a specific configuration value."""
-    data = request.get_json()
+    data = json_body()
     if data is None or "value" not in data:
-        return jsonify({"error": "Value required"}), 400
+        return ojsonify({"error": "Value required"}), 400
 
     success, message = config_manager.set(key, data["value"], source="api")
-    return jsonify({
+    return ojsonify({
         "success": success,
         "message": message,
         "key": key,
@@ -996,7 +1656,7 @@ def set_config_value(key):
 def reset_config():
     """Reset configuration to defaults."""
     old_config = config_manager.reset_to_defaults()
-    return jsonify({
+    return ojsonify({
         "status": "reset",
         "previous_config": old_config,
         "current_config": config_manager.get_all(),
@@ -1008,7 +1668,7 @@ def config_history():
     """Get configuration change history."""
     limit = request.args.get('limit', 50, type=int)
     history = config_manager.get_history(limit)
-    return jsonify({
+    return ojsonify({
         "count": len(history),
         "history": history,
     })
@@ -1025,6 +1685,9 @@ def cleanup():
     # Stop command polling
     command_poller.stop()
 
+    # Don't wait on a download that may never finish
+    _job_pool.shutdown(wait=False)
+
     # Stop verifier sync
     if verifier_client:
         verifier_client.stop()
@@ -1032,11 +1695,16 @@ def cleanup():
     # Stop telemetry
     telemetry_collector.stop()
 
+    # Stop mDNS browser
+    peer_browser.stop()
+
     # Clean up GPIO
     if RUNNING_ON_PI and GPIO:
         for pwm in pwms.values():
             pwm.ChangeDutyCycle(0)
             pwm.stop()
+        if pigpio_pi:
+            pigpio_pi.stop()
         GPIO.cleanup()
         print("[OK] GPIO cleaned up")
 
@@ -1055,56 +1723,119 @@ import requests
 class CommandPoller:
     """Polls backend for pending commands and executes them."""
 
-    def __init__(self, device_id, backend_url, poll_interval=10):
+    # (connect, read) timeouts for backend calls
+    REQUEST_TIMEOUT = (3, 10)
+
+    # Long-poll: ask the backend to hold the request until a command arrives
+    LONG_POLL_SECONDS = 30
+    LONG_POLL_TIMEOUT = (3, LONG_POLL_SECONDS + 5)
+
+    # Upper bound for the exponential backoff while the backend is failing
+    MAX_BACKOFF_SECONDS = 60
+
+    def __init__(self, device_id, backend_url, poll_interval=10, session=None):
         self.device_id = device_id
         self.backend_url = backend_url.rstrip('/')
         self.poll_interval = poll_interval
-        self._running = False
         self._thread = None
+        self._stop_event = threading.Event()
+        self._consecutive_failures = 0
+
+        # Keep-alive session, so polls and acks reuse one TLS connection
+        self._session = session or get_shared_session(device_id)
+
+        # Command type -> handler(value)
+        self._dispatch = {
+            'fan': self._handle_fan_command,
+            # Direct speed control (0-100)
+            'set_speed': self._handle_fan_command,
+            # Check for OTA updates
+            'check_update': lambda value: self._handle_check_update(),
+            # Download and install OTA update
+            'perform_update': lambda value: self._handle_perform_update(),
+        }
 
     def start(self):
         """Start command polling in background thread."""
-        if self._running:
+        if self._thread and self._thread.is_alive():
             return
-        self._running = True
+        self._stop_event.clear()
         self._thread = threading.Thread(target=self._poll_loop, daemon=True)
         self._thread.start()
-        print(f"[CMD] Command polling started (every {self.poll_interval}s)")
+        cmd_log.info("[CMD] Command polling started (every %ss)", self.poll_interval)
 
     def stop(self):
         """Stop command polling."""
-        self._running = False
+        self._stop_event.set()
         if self._thread:
             self._thread.join(timeout=5)
-        print("[CMD] Command polling stopped")
+        cmd_log.info("[CMD] Command polling stopped")
 
     def _poll_loop(self):
         """Main polling loop."""
-        while self._running:
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            got_commands = False
             try:
-                self._check_commands()
+                got_commands = self._check_commands()
             except Exception as e:
-                print(f"[CMD] Poll error: {e}")
-            time.sleep(self.poll_interval)
+                self._consecutive_failures += 1
+                cmd_log.warning("[CMD] Poll error: %s", e)
+
+            if self._consecutive_failures:
+                self._stop_event.wait(self._backoff_delay())
+                continue
+
+            # A backend that honours ?wait= held the request open, so reconnect
+            # right away. One that answered immediately gets the normal
+            # short-poll spacing.
+            elapsed = time.monotonic() - started
+            if not got_commands and elapsed < self.poll_interval:
+                self._stop_event.wait(self.poll_interval - elapsed)
+
+    def _backoff_delay(self) -> float:
+        """Exponential backoff with jitter, so devices don't reconnect in lockstep."""
+        exponent = min(self._consecutive_failures - 1, 10)
+        delay = min(self.MAX_BACKOFF_SECONDS, self.poll_interval * 2 ** exponent)
+        return delay * (0.5 + random.random())
+
+    def _check_commands(self) -> bool:
+        """
+        Long-poll for pending commands and execute them.
 
-    def _check_commands(self):
-        """Check for and execute pending commands."""
+        Returns:
+            True if any commands were received
+        """
         try:
             url = f"{self.backend_url}/api/devices/{self.device_id}/commands/pending"
-            response = requests.get(url, timeout=10)
+            response = self._session.get(
+                url,
+                params={'wait': self.LONG_POLL_SECONDS},
+                timeout=self.LONG_POLL_TIMEOUT,
+            )
 
+            # 204 = wait expired with nothing queued
+            if response.status_code == 204:
+                self._consecutive_failures = 0
+                return False
             if response.status_code != 200:
-                return
+                self._consecutive_failures += 1
+                return False
 
-            data = response.json()
+            data = json_loads(response.content)
             commands = data.get('commands', [])
+            self._consecutive_failures = 0
 
             for cmd in commands:
                 self._execute_command(cmd)
 
-        except requests.RequestException as e:
-            # Silently ignore connection errors (backend may be unavailable)
-            pass
+            return bool(commands)
+
+        except (requests.RequestException, ValueError) as e:
+            # Silently ignore connection errors (backend may be unavailable);
+            # _poll_loop backs off until it comes back
+            self._consecutive_failures += 1
+            return False
 
     def _execute_command(self, cmd):
         """Execute a single command."""
@@ -1112,38 +1843,28 @@ class CommandPoller:
         cmd_type = cmd.get('command')
         cmd_value = cmd.get('value')
 
-        print(f"[CMD] Received: {cmd_type} = {cmd_value}")
+        cmd_log.info("[CMD] Received: %s = %s", cmd_type, cmd_value)
 
         success = False
         error = None
 
         try:
-            if cmd_type == 'fan':
-                success = self._handle_fan_command(cmd_value)
-            elif cmd_type == 'set_speed':
-                # Direct speed control (0-100)
-                success = self._handle_fan_command(cmd_value)
-            elif cmd_type == 'check_update':
-                # Check for OTA updates
-                success = self._handle_check_update()
-            elif cmd_type == 'perform_update':
-                # Download and install OTA update
-                success = self._handle_perform_update()
+            handler = self._dispatch.get(cmd_type)
+            if handler:
+                success = handler(cmd_value)
             else:
                 error = f"Unknown command: {cmd_type}"
-                print(f"[CMD] {error}")
+                cmd_log.warning("[CMD] %s", error)
 
         except Exception as e:
             error = str(e)
-            print(f"[CMD] Execution error: {e}")
+            cmd_log.warning("[CMD] Execution error: %s", e)
 
         # Acknowledge command
         self._ack_command(cmd_id, success, error)
 
     def _handle_fan_command(self, value):
         """Handle fan on/off command."""
-        global current_speeds
-
         if value == 'on':
             target_speed = 100  # Full speed when turned on
         elif value == 'off':
@@ -1153,50 +1874,125 @@ class CommandPoller:
             try:
                 target_speed = int(value)
             except ValueError:
-                print(f"[CMD] Invalid fan value: {value}")
+                cmd_log.warning("[CMD] Invalid fan value: %s", value)
+                return False
+
+            # Checked here: the ramp worker applies it later, off this thread
+            if not 0 <= target_speed <= 100:
+                cmd_log.warning("[CMD] Fan speed out of range (0-100): %s", value)
                 return False
 
-        print(f"[CMD] Setting fans to {target_speed}%")
+        cmd_log.debug("[CMD] Setting fans to %s%%", target_speed)
 
-        # Set all fans to target speed
-        for name in FAN_PWM_PINS:
-            current_speeds[name] = target_speed
-            if RUNNING_ON_PI and name in pwms:
-                pwms[name].ChangeDutyCycle(target_speed)
+        # Set all fans to target speed (superseding any ramp in progress)
+        request_ramp(target_speed, staggered=False)
 
-        print(f"[CMD] Fans set to {target_speed}%")
+        cmd_log.info("[CMD] Fans set to %s%%", target_speed)
         return True
 
     def _handle_check_update(self):
         """Check for OTA updates."""
-        print("[CMD] Checking for OTA updates...")
+        cmd_log.debug("[CMD] Checking for OTA updates...")
         available, manifest, message = update_manager.check_for_updates()
-        print(f"[CMD] Update check: {message}")
+        cmd_log.info("[CMD] Update check: %s", message)
         return True
 
     def _handle_perform_update(self):
         """Download and install OTA update."""
-        print("[CMD] Performing OTA update...")
+        cmd_log.info("[CMD] Performing OTA update...")
         success, message = update_manager.perform_update(auto_backup=True, auto_restart=True)
-        print(f"[CMD] Update result: {message}")
+        cmd_log.info("[CMD] Update result: %s", message)
         return success
 
     def _ack_command(self, cmd_id, success, error=None):
         """Acknowledge command execution to backend."""
         try:
             url = f"{self.backend_url}/api/devices/{self.device_id}/commands/{cmd_id}/ack"
-            response = requests.post(url, json={
-                'success': success,
-                'error': error
-            }, timeout=10)
+            payload = json_bytes({'success': success, 'error': error})
+            response = self._session.post(
+                url,
+                data=payload,
+                headers={'Content-Type': 'application/json'},
+                timeout=self.REQUEST_TIMEOUT,
+            )
             if response.status_code == 200:
-                print(f"[CMD] Acknowledged: {cmd_id}")
+                cmd_log.info("[CMD] Acknowledged: %s", cmd_id)
         except Exception as e:
-            print(f"[CMD] Ack failed: {e}")
+            cmd_log.warning("[CMD] Ack failed: %s", e)
 
 
-# Initialize command poller
-command_poller = CommandPoller(DEVICE_ID, BACKEND_URL, poll_interval=10)
+class MQTTCommandSubscriber(CommandPoller):
+    """
+    Receives commands pushed over MQTT instead of polling for them.
+
+    Subscribes to devices/{device_id}/commands on one persistent connection
+    and acks on devices/{device_id}/ack. Command handling is shared with
+    CommandPoller.
+    """
+
+    def __init__(self, device_id, backend_url, broker_host, broker_port=1883,
+                 keepalive=60, session=None):
+        super().__init__(device_id, backend_url, session=session)
+        self.broker_host = broker_host
+        self.broker_port = broker_port
+        self.keepalive = keepalive
+        self.command_topic = f"devices/{device_id}/commands"
+        self.ack_topic = f"devices/{device_id}/ack"
+
+        if hasattr(mqtt, 'CallbackAPIVersion'):
+            # paho-mqtt 2.x
+            self._client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=device_id)
+        else:
+            self._client = mqtt.Client(client_id=device_id)
+        self._client.on_connect = self._on_connect
+        self._client.on_message = self._on_message
+
+        # One worker: commands run in arrival order, as with polling
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mqtt-cmd")
+
+    def start(self):
+        """Connect to the broker and handle commands on paho's network thread."""
+        # connect_async + loop_start retries in the background if the broker is down
+        self._client.connect_async(self.broker_host, self.broker_port, keepalive=self.keepalive)
+        self._client.loop_start()
+        cmd_log.info("[CMD] Command push started (mqtt://%s:%s)", self.broker_host, self.broker_port)
+
+    def stop(self):
+        """Disconnect from the broker."""
+        self._client.disconnect()
+        self._client.loop_stop()
+        self._executor.shutdown(wait=False)
+        cmd_log.info("[CMD] Command push stopped")
+
+    def _on_connect(self, client, userdata, flags, *args):
+        # (Re)subscribe on every connect so reconnects keep the subscription
+        client.subscribe(self.command_topic, qos=1)
+
+    def _on_message(self, client, userdata, message):
+        try:
+            cmd = json_loads(message.payload)
+        except ValueError:
+            cmd_log.warning("[CMD] Invalid command payload on %s", message.topic)
+            return
+
+        # Long-running commands (OTA) must not block paho's network thread
+        self._executor.submit(self._execute_command, cmd)
+
+    def _ack_command(self, cmd_id, success, error=None):
+        """Acknowledge command execution over MQTT."""
+        payload = json_bytes({'id': cmd_id, 'success': success, 'error': error})
+        self._client.publish(self.ack_topic, payload, qos=1)
+        cmd_log.info("[CMD] Acknowledged: %s", cmd_id)
+
+
+# Initialize command receiver (MQTT push when a broker is configured)
+if MQTT_AVAILABLE and MQTT_BROKER_HOST:
+    command_poller = MQTTCommandSubscriber(
+        DEVICE_ID, BACKEND_URL, MQTT_BROKER_HOST, MQTT_BROKER_PORT,
+        keepalive=MQTT_KEEPALIVE_SECONDS, session=http_session,
+    )
+else:
+    command_poller = CommandPoller(DEVICE_ID, BACKEND_URL, poll_interval=10, session=http_session)
 
 
 # ============================================
@@ -1215,6 +2011,12 @@ class OTAScheduler:
     # How long fans must be at 0% before installing update (seconds)
     FANS_OFF_THRESHOLD = 300  # 5 minutes
 
+    # How often to ask for a new update while none is pending (seconds)
+    UPDATE_CHECK_INTERVAL = 60
+
+    # Longest wait between install retries after repeated failures (seconds)
+    MAX_RETRY_INTERVAL = 3600
+
     def __init__(self, update_manager, auto_install=True):
         """
         Initialize OTA scheduler.
@@ -1225,94 +2027,105 @@ class OTAScheduler:
         """
         self.update_manager = update_manager
         self.auto_install = auto_install
-        self._running = False
         self._thread = None
+        self._stop_event = threading.Event()
         self._pending_update = None
-        self._fans_off_since = None  # Timestamp when fans went to 0%
+        self._failed_installs = 0
 
     def start(self):
         """Start automatic update checking."""
-        if self._running:
+        if self._thread and self._thread.is_alive():
             return
-        self._running = True
+        self._stop_event.clear()
         self._thread = threading.Thread(target=self._check_loop, daemon=True)
         self._thread.start()
-        print("[OTA] Smart update scheduler started (installs when fans are OFF)")
+        ota_log.info("[OTA] Smart update scheduler started (installs when fans are OFF)")
 
     def stop(self):
         """Stop automatic update checking."""
-        self._running = False
+        self._stop_event.set()
         if self._thread:
             self._thread.join(timeout=5)
-        print("[OTA] Update scheduler stopped")
+        ota_log.info("[OTA] Update scheduler stopped")
 
     def check_pending_on_boot(self):
         """Check for and install pending updates on boot (before fans start)."""
-        print("[OTA] Checking for pending updates on boot...")
+        ota_log.info("[OTA] Checking for pending updates on boot...")
         available, manifest, message = self.update_manager.check_for_updates()
 
         if available:
-            print(f"[OTA] Update available on boot: {manifest.version}. Installing now...")
+            ota_log.info("[OTA] Update available on boot: %s. Installing now...", manifest.version)
             success, msg = self.update_manager.perform_update(
                 auto_backup=True,
                 auto_restart=True
             )
-            print(f"[OTA] Boot update result: {msg}")
+            ota_log.info("[OTA] Boot update result: %s", msg)
             return success
         else:
-            print(f"[OTA] {message}")
+            ota_log.info("[OTA] %s", message)
             return False
 
     def _check_loop(self):
         """Main update check loop."""
         # Wait 2 minutes after boot before starting checks
-        time.sleep(120)
+        if self._stop_event.wait(120):
+            return
 
-        while self._running:
+        while not self._stop_event.is_set():
             try:
-                # Check for updates every 30 minutes
                 if self._pending_update is None:
                     self._check_for_updates()
 
-                # Check if fans are off and we can install
-                if self._pending_update:
-                    self._check_fans_and_install()
+                # Blocks on the fan events rather than polling speeds; loop
+                # straight back only if it waited on the fans, not after an
+                # install attempt or a no-op
+                if self._pending_update and self._check_fans_and_install():
+                    continue
 
             except Exception as e:
-                print(f"[OTA] Scheduler error: {e}")
+                ota_log.warning("[OTA] Scheduler error: %s", e)
 
-            # Check every minute
-            time.sleep(60)
+            # Back off after failed installs so a broken update isn't retried
+            # against the download server every minute
+            delay = self.UPDATE_CHECK_INTERVAL * (2 ** min(self._failed_installs, 6))
+            self._stop_event.wait(min(delay, self.MAX_RETRY_INTERVAL))
 
     def _check_for_updates(self):
         """Check if update is available."""
-        print("[OTA] Checking for updates...")
+        ota_log.debug("[OTA] Checking for updates...")
         available, manifest, message = self.update_manager.check_for_updates()
-        print(f"[OTA] {message}")
+        ota_log.debug("[OTA] %s", message)
 
         if available:
             self._pending_update = manifest
-            print(f"[OTA] Update {manifest.version} queued - will install when fans are OFF")
+            ota_log.info("[OTA] Update %s queued - will install when fans are OFF", manifest.version)
 
-    def _check_fans_and_install(self):
-        """Check if fans are off long enough to safely install update."""
-        # Check current fan speeds
-        all_fans_off = all(speed == 0 for speed in current_speeds.values())
+    def _check_fans_and_install(self) -> bool:
+        """
+        Wait for fans to stay off long enough to safely install update.
 
-        if all_fans_off:
-            if self._fans_off_since is None:
-                self._fans_off_since = time.time()
-                print("[OTA] Fans are OFF, starting countdown...")
-            else:
-                off_duration = time.time() - self._fans_off_since
-                if off_duration >= self.FANS_OFF_THRESHOLD:
-                    print(f"[OTA] Fans OFF for {int(off_duration)}s. Safe to install update.")
-                    self._install_pending_update()
-        else:
-            # Fans are running, reset countdown
-            if self._fans_off_since is not None:
-                print("[OTA] Fans turned ON, update postponed")
-            self._fans_off_since = None
+        Returns:
+            True if it returned because the fans were running (check again
+            right away), False after an install attempt
+        """
+        # Wakes as soon as the fans stop (timeout just re-checks for shutdown)
+        if not fans_all_off.wait(timeout=self.FANS_OFF_THRESHOLD):
+            return True
+
+        # Count from when the fans actually turned off, not from this check
+        remaining = self.FANS_OFF_THRESHOLD - (time.monotonic() - _fans_off_since)
+        ota_log.debug("[OTA] Fans are OFF, %.0fs left in countdown...", max(remaining, 0))
+        if remaining > 0 and fans_running.wait(timeout=remaining):
+            # Fans came back on during the countdown
+            ota_log.info("[OTA] Fans turned ON, update postponed")
+            return True
+
+        if fans_running.is_set() or self._stop_event.is_set():
+            return True
+
+        ota_log.info("[OTA] Fans OFF for %ss. Safe to install update.", self.FANS_OFF_THRESHOLD)
+        self._install_pending_update()
+        return False
 
     def _install_pending_update(self):
         """Install the pending update."""
@@ -1320,17 +2133,19 @@ class OTAScheduler:
             return
 
         manifest = self._pending_update
-        print(f"[OTA] Installing update: {manifest.version}")
+        ota_log.info("[OTA] Installing update: %s", manifest.version)
 
         success, msg = self.update_manager.perform_update(
             auto_backup=True,
             auto_restart=True
         )
-        print(f"[OTA] Update result: {msg}")
+        ota_log.info("[OTA] Update result: %s", msg)
 
         if success:
             self._pending_update = None
-            self._fans_off_since = None
+            self._failed_installs = 0
+        else:
+            self._failed_installs += 1
 
 
 # Initialize OTA scheduler (installs when fans are OFF)
@@ -1345,7 +2160,6 @@ def fix_avahi_ipv6():
     """Disable IPv6 in avahi to prevent .local resolving to unusable link-local addresses."""
     avahi_conf = "/etc/avahi/avahi-daemon.conf"
     try:
-        import subprocess
         with open(avahi_conf, 'r') as f:
             content = f.read()
         changed = False
@@ -1380,6 +2194,13 @@ def fix_avahi_ipv6():
 
 
 if __name__ == '__main__':
+    # Unknown LOG_LEVEL names fall back to INFO rather than failing startup
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL.upper(), logging.INFO),
+        format="%(message)s",
+        stream=sys.stdout,
+    )
+
     print("=" * 60)
     print("  BeautiFi IoT - DUAN Proof-of-Air Device")
     print(f"  Device ID: {DEVICE_ID}")
@@ -1410,5 +2231,32 @@ if __name__ == '__main__':
     # Start OTA auto-update scheduler
     ota_scheduler.start()
 
+    # Start mDNS peer browser for /api/network/discover
+    peer_browser.start()
+
+    # Generate the hardware manifest off the request path
+    threading.Thread(
+        target=lambda: _ensure_manifest(time.monotonic()), daemon=True
+    ).start()
+
+    # Build Werkzeug's route matcher now rather than on the first request
+    app.url_map.bind('localhost').match('/api/info')
+
     # Run Flask server
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    if WAITRESS_AVAILABLE:
+        # Production WSGI server with keep-alive and a bounded worker pool.
+        # /api/stream holds a worker per client, capped at STREAM_MAX_CLIENTS
+        # so the rest stay free for normal routes.
+        print(f"[OK] Serving on waitress ({WAITRESS_THREADS} threads)")
+        serve(
+            app,
+            host='0.0.0.0',
+            port=5000,
+            threads=WAITRESS_THREADS,
+            connection_limit=100,
+            channel_timeout=30,
+        )
+    else:
+        # Each request gets its own thread so slow backend/subprocess calls
+        # (sync, ping, update check, mDNS browse) never stall the dashboard.
+        app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
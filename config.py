@@ -25,19 +25,26 @@ SIMULATION_MODE = True
 # ============================================
 # Load device ID from identity file if it exists, otherwise use fallback
 def _load_device_id():
-    """Load device ID from cryptographic identity file."""
+    """Load device ID from the environment or the cryptographic identity file."""
+    # Pinned ID (e.g. in .env) skips the home-directory lookup and file read
+    device_id = os.getenv("BEAUTIFI_DEVICE_ID")
+    if device_id:
+        print(f"[CONFIG] Using device ID from environment: {device_id}")
+        return device_id
+
     import json
     identity_path = Path.home() / ".beautifi" / "keys" / "identity.json"
-    if identity_path.exists():
-        try:
-            with open(identity_path, 'r') as f:
-                identity = json.load(f)
-                device_id = identity.get("device_id")
-                if device_id:
-                    print(f"[CONFIG] Loaded device ID from identity: {device_id}")
-                    return device_id
-        except Exception as e:
-            print(f"[CONFIG] Failed to load identity: {e}")
+    try:
+        with open(identity_path, 'r') as f:
+            identity = json.load(f)
+            device_id = identity.get("device_id")
+            if device_id:
+                print(f"[CONFIG] Loaded device ID from identity: {device_id}")
+                return device_id
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[CONFIG] Failed to load identity: {e}")
     # Fallback for devices without identity file
     print("[CONFIG] Using fallback device ID: btfi-iot-001")
     return "btfi-iot-001"
@@ -46,6 +53,12 @@ DEVICE_ID = _load_device_id()
 SITE_ID = "site-test-001"
 FIRMWARE_VERSION = "0.6.0"
 
+# ============================================
+# LOGGING
+# ============================================
+# DEBUG shows per-step command/OTA diagnostics; INFO keeps the essentials
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
 # ============================================
 # FAN SPECIFICATIONS (AC Infinity Cloudline S6)
 # ============================================
@@ -153,12 +166,19 @@ VERIFIER_API_KEY = None  # Optional API key for verifier auth
 API_TIMEOUT_SECONDS = 10
 SYNC_INTERVAL_SECONDS = 30  # How often to retry buffered data
 ENABLE_VERIFIER_SYNC = True  # Set False to disable verifier streaming
+VERIFIER_BATCH_SAMPLES = False  # Set True only if the verifier serves /api/telemetry/batch
 
 # ============================================
 # REGISTRATION / BACKEND SETTINGS
 # ============================================
 BACKEND_URL = "https://salon-safe-backend.onrender.com"  # SalonSafe backend API
 
+# Remote commands are pushed over MQTT when a broker is configured,
+# otherwise the device long-polls BACKEND_URL for them
+MQTT_BROKER_HOST = os.getenv("MQTT_BROKER_HOST")
+MQTT_BROKER_PORT = int(os.getenv("MQTT_BROKER_PORT", "1883"))
+MQTT_KEEPALIVE_SECONDS = 60
+
 # Blockchain (BSC Testnet)
 BSC_RPC_URL = "https://data-seed-prebsc-1-s1.binance.org:8545/"
 TOKEN_CONTRACT_ADDRESS = "0x039a5E5Aa286157ccB84378e26Ea702929DA540c"  # SLN Token
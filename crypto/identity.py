@@ -7,6 +7,7 @@ Handles Ed25519 keypair generation, storage, and retrieval.
 import os
 import json
 import hashlib
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Tuple
@@ -42,6 +43,8 @@ class DeviceIdentity:
         self.key_dir = Path(key_dir) if key_dir else self.DEFAULT_KEY_DIR
         self._private_key: Optional[Ed25519PrivateKey] = None
         self._public_key: Optional[Ed25519PublicKey] = None
+        self._public_key_raw: bytes = b""
+        self._public_key_hex: str = ""
         self._device_id = device_id
         self._identity_info: dict = {}
 
@@ -53,12 +56,8 @@ class DeviceIdentity:
 
     def _generate_device_id(self) -> str:
         """Generate a unique device ID from the public key."""
-        public_bytes = self._public_key.public_bytes(
-            encoding=serialization.Encoding.Raw,
-            format=serialization.PublicFormat.Raw
-        )
         # Use first 8 bytes of SHA256 hash as device ID
-        hash_bytes = hashlib.sha256(public_bytes).digest()[:8]
+        hash_bytes = hashlib.sha256(self._public_key_raw).digest()[:8]
         return f"btfi-{hash_bytes.hex()}"
 
     def _load_or_generate(self):
@@ -99,7 +98,7 @@ class DeviceIdentity:
     def _generate_keys(self):
         """Generate a new Ed25519 keypair."""
         self._private_key = Ed25519PrivateKey.generate()
-        self._public_key = self._private_key.public_key()
+        self._set_public_key(self._private_key.public_key())
 
     def _load_keys(self, private_path: Path, public_path: Path):
         """Load keys from PEM files."""
@@ -109,7 +108,16 @@ class DeviceIdentity:
                 password=None,
                 backend=default_backend()
             )
-        self._public_key = self._private_key.public_key()
+        self._set_public_key(self._private_key.public_key())
+
+    def _set_public_key(self, public_key: Ed25519PublicKey):
+        """Store the public key along with its raw bytes and hex, which never change."""
+        self._public_key = public_key
+        self._public_key_raw = public_key.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+        self._public_key_hex = self._public_key_raw.hex()
 
     def _save_keys(self, private_path: Path, public_path: Path):
         """Save keys to PEM files."""
@@ -144,19 +152,12 @@ class DeviceIdentity:
     @property
     def public_key_hex(self) -> str:
         """Get the public key as hex string."""
-        public_bytes = self._public_key.public_bytes(
-            encoding=serialization.Encoding.Raw,
-            format=serialization.PublicFormat.Raw
-        )
-        return public_bytes.hex()
+        return self._public_key_hex
 
     @property
     def public_key_bytes(self) -> bytes:
         """Get the raw public key bytes."""
-        return self._public_key.public_bytes(
-            encoding=serialization.Encoding.Raw,
-            format=serialization.PublicFormat.Raw
-        )
+        return self._public_key_raw
 
     def sign(self, data: bytes) -> bytes:
         """
@@ -203,13 +204,17 @@ class DeviceIdentity:
 
 # Module-level singleton for convenience
 _identity: Optional[DeviceIdentity] = None
+_identity_lock = threading.Lock()
 
 
 def get_device_identity(key_dir: Optional[Path] = None) -> DeviceIdentity:
     """Get or create the device identity singleton."""
     global _identity
     if _identity is None:
-        _identity = DeviceIdentity(key_dir=key_dir)
+        # Two first callers must not both generate (and save) a keypair
+        with _identity_lock:
+            if _identity is None:
+                _identity = DeviceIdentity(key_dir=key_dir)
     return _identity
 
 
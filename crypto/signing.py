@@ -5,18 +5,47 @@ Includes payload signing, epoch signing, and Merkle tree generation.
 """
 
 import json
+import re
 import hashlib
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 from .identity import DeviceIdentity, get_device_identity
 
+# Fast JSON (optional - falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _ORJSON_CANONICAL = (
+        orjson.OPT_SORT_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_PASSTHROUGH_SUBCLASS
+    )
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Output where orjson and json.dumps can disagree: exponent floats (1e-05 vs
+# 0.00001, 1e+16 vs 1e16), NaN/Infinity (orjson writes null) and DEL, which
+# json.dumps escapes. Non-ASCII is checked separately with bytes.isascii().
+_ORJSON_MISMATCH_RE = re.compile(rb'[:,\[]-?(?:\d+(?:\.\d+)?e|0\.0000)|null|\x7f')
+
 
 def canonicalize_json(data: dict) -> bytes:
     """
     Convert dict to canonical JSON bytes for consistent hashing.
     Uses sorted keys and no whitespace.
+
+    The bytes are identical to json.dumps(sort_keys=True, separators=(',', ':'));
+    orjson is used when installed and its output can't differ from that.
     """
+    if ORJSON_AVAILABLE:
+        try:
+            out = orjson.dumps(data, option=_ORJSON_CANONICAL)
+        except TypeError:
+            out = None  # e.g. ints over 64 bits or subclasses: let json decide
+        if out is not None and out.isascii() and not _ORJSON_MISMATCH_RE.search(out):
+            return out
     return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
 
 
@@ -65,12 +94,12 @@ def sign_payload(
     if include_timestamp and 'timestamp' not in payload_copy:
         payload_copy['timestamp'] = datetime.utcnow().isoformat() + 'Z'
 
-    # Canonicalize and hash the payload
-    canonical = canonicalize_json(payload_copy)
-    payload_hash = hash_hex(canonical)
+    # Canonicalize and hash the payload (one digest for both the hash field and signature)
+    digest = hash_data(canonicalize_json(payload_copy))
+    payload_hash = digest.hex()
 
     # Sign the hash
-    signature = identity.sign_hex(hash_data(canonical))
+    signature = identity.sign_hex(digest)
 
     # Add signing metadata
     payload_copy['_signing'] = {
@@ -107,8 +136,8 @@ def verify_signature(
     payload_copy = {k: v for k, v in payload.items() if not k.startswith('_signing')}
 
     # Canonicalize and hash
-    canonical = canonicalize_json(payload_copy)
-    computed_hash = hash_hex(canonical)
+    digest = hash_data(canonicalize_json(payload_copy))
+    computed_hash = digest.hex()
 
     # Check hash matches
     if computed_hash != signing_info.get('payload_hash'):
@@ -124,7 +153,7 @@ def verify_signature(
 
     try:
         signature = bytes.fromhex(signature_str)
-        is_valid = identity.verify(hash_data(canonical), signature)
+        is_valid = identity.verify(digest, signature)
         if is_valid:
             return True, "Signature valid"
         else:
@@ -150,31 +179,23 @@ def create_merkle_root(items: List[bytes]) -> Tuple[str, List[str]]:
     if not items:
         return hash_hex(b""), []
 
+    sha256 = hashlib.sha256
+
     # Hash all items to create leaves
-    leaves = [hash_data(item) for item in items]
+    leaves = [sha256(item).digest() for item in items]
     leaf_hashes = [leaf.hex() for leaf in leaves]
 
-    # Build tree bottom-up
+    # Build tree bottom-up, one whole level per comprehension
     current_level = leaves
 
     while len(current_level) > 1:
-        next_level = []
-
-        for i in range(0, len(current_level), 2):
-            left = current_level[i]
-
-            # If odd number of nodes, duplicate the last one
-            if i + 1 < len(current_level):
-                right = current_level[i + 1]
-            else:
-                right = left
-
-            # Combine and hash
-            combined = left + right
-            parent = hash_data(combined)
-            next_level.append(parent)
+        # If odd number of nodes, duplicate the last one
+        if len(current_level) % 2:
+            current_level = current_level + current_level[-1:]
 
-        current_level = next_level
+        # Pair neighbours (left, right) and hash each 64-byte concatenation
+        pairs = iter(current_level)
+        current_level = [sha256(left + right).digest() for left, right in zip(pairs, pairs)]
 
     root = current_level[0].hex()
     return root, leaf_hashes
@@ -239,9 +260,9 @@ def sign_epoch(
     }
 
     # Sign the epoch
-    canonical = canonicalize_json(epoch_doc)
-    epoch_hash = hash_hex(canonical)
-    signature = identity.sign_hex(hash_data(canonical))
+    digest = hash_data(canonicalize_json(epoch_doc))
+    epoch_hash = digest.hex()
+    signature = identity.sign_hex(digest)
 
     # Add signing metadata
     epoch_doc['_signing'] = {
@@ -280,8 +301,8 @@ def verify_epoch(
     epoch_copy = {k: v for k, v in epoch_doc.items() if not k.startswith('_signing')}
 
     # Canonicalize and hash
-    canonical = canonicalize_json(epoch_copy)
-    computed_hash = hash_hex(canonical)
+    digest = hash_data(canonicalize_json(epoch_copy))
+    computed_hash = digest.hex()
 
     # Check hash matches
     if computed_hash != signing_info.get('epoch_hash'):
@@ -297,7 +318,7 @@ def verify_epoch(
 
     try:
         signature = bytes.fromhex(signature_str)
-        is_valid = identity.verify(hash_data(canonical), signature)
+        is_valid = identity.verify(digest, signature)
         if not is_valid:
             return False, "Signature invalid"
     except Exception as e:
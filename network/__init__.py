@@ -1,7 +1,12 @@
 # network/__init__.py
 from .verifier_client import VerifierClient, SyncStatus
+from .http_session import get_shared_session
+from .discovery import PeerBrowser, get_local_ip
 
 __all__ = [
     'VerifierClient',
     'SyncStatus',
+    'get_shared_session',
+    'PeerBrowser',
+    'get_local_ip',
 ]
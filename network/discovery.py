@@ -0,0 +1,204 @@
+# network/discovery.py
+"""
+mDNS peer discovery for BeautiFi IoT devices.
+
+Keeps a live map of `_beautifi._tcp` peers with a long-lived zeroconf
+browser so lookups never block on a network scan. Without zeroconf, a
+background thread refreshes the map from `avahi-browse` instead.
+"""
+
+import re
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Zeroconf (optional - falls back to avahi-browse)
+try:
+    from zeroconf import IPVersion, ServiceBrowser, ServiceStateChange, Zeroconf
+    ZEROCONF_AVAILABLE = True
+except ImportError:
+    ZEROCONF_AVAILABLE = False
+
+
+SERVICE_TYPE = "_beautifi._tcp.local."
+AVAHI_SERVICE_TYPE = "_beautifi._tcp"
+AVAHI_REFRESH_SECONDS = 30
+RESOLVE_WORKERS = 2
+
+# Resolved entries from `avahi-browse -p`:
+#   =;iface;proto;name;type;domain;hostname;address;port;txt
+_AVAHI_RESOLVED_RE = re.compile(rb'^=;(?:[^;\n]*;){5}([^;\n]*);([^;\n]*);([^;\n]*)', re.MULTILINE)
+
+LOCAL_IP_REFRESH_SECONDS = 60
+
+_local_ip_cache = {"ip": None, "expires_at": 0.0}
+
+
+def get_local_ip() -> Optional[str]:
+    """Get this device's outbound IPv4 address (cached for a minute)."""
+    now = time.monotonic()
+    if now < _local_ip_cache["expires_at"]:
+        return _local_ip_cache["ip"]
+
+    ip = None
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(('8.8.8.8', 80))
+        ip = s.getsockname()[0]
+        s.close()
+    except OSError:
+        pass
+
+    _local_ip_cache["ip"] = ip
+    _local_ip_cache["expires_at"] = now + LOCAL_IP_REFRESH_SECONDS
+    return ip
+
+
+class PeerBrowser:
+    """
+    Tracks BeautiFi peers advertised over mDNS.
+
+    With zeroconf installed, a ServiceBrowser keeps `peers` up to date via
+    add/remove callbacks. Otherwise a background thread re-runs
+    `avahi-browse` every AVAHI_REFRESH_SECONDS, so callers never wait on
+    the subprocess.
+    """
+
+    def __init__(self):
+        self._peers: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._zeroconf = None
+        self._browser = None
+        self._resolver: Optional[ThreadPoolExecutor] = None
+        self._avahi_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self._browser is not None or (
+            self._avahi_thread is not None and self._avahi_thread.is_alive()
+        )
+
+    def start(self):
+        """Start background peer discovery."""
+        if self.is_running:
+            return
+
+        if ZEROCONF_AVAILABLE:
+            try:
+                self._resolver = ThreadPoolExecutor(
+                    max_workers=RESOLVE_WORKERS, thread_name_prefix="mdns-resolve"
+                )
+                self._zeroconf = Zeroconf(ip_version=IPVersion.V4Only)
+                self._browser = ServiceBrowser(
+                    self._zeroconf,
+                    SERVICE_TYPE,
+                    handlers=[self._on_service_state_change],
+                )
+                print("[DISCOVER] mDNS browser started")
+                return
+            except Exception as e:
+                print(f"[DISCOVER] mDNS browser failed to start: {e}")
+                self._zeroconf = None
+                self._browser = None
+                self._resolver.shutdown(wait=False)
+                self._resolver = None
+
+        self._stop_event.clear()
+        self._avahi_thread = threading.Thread(target=self._avahi_loop, daemon=True)
+        self._avahi_thread.start()
+        print("[DISCOVER] avahi-browse refresh started")
+
+    def stop(self):
+        """Stop background peer discovery."""
+        if self._zeroconf:
+            self._zeroconf.close()
+        self._zeroconf = None
+        self._browser = None
+        if self._resolver:
+            self._resolver.shutdown(wait=False)
+        self._resolver = None
+
+        self._stop_event.set()
+        if self._avahi_thread:
+            self._avahi_thread.join(timeout=5)
+        self._avahi_thread = None
+
+    def get_peers(self) -> List[dict]:
+        """Get discovered peers as a list of {hostname, ip, port} dicts."""
+        if not self.is_running:
+            return self._browse_avahi()
+
+        with self._lock:
+            return list(self._peers.values())
+
+    # ============================================
+    # Zeroconf callbacks
+    # ============================================
+
+    def _on_service_state_change(self, zeroconf, service_type, name, state_change):
+        """Handle peers appearing and disappearing."""
+        if state_change is ServiceStateChange.Removed:
+            with self._lock:
+                self._peers.pop(name, None)
+        else:
+            # Resolving blocks, so keep it off the zeroconf event thread
+            resolver = self._resolver
+            if resolver:
+                resolver.submit(self._resolve, zeroconf, service_type, name)
+
+    def _resolve(self, zeroconf, service_type, name):
+        """Resolve a service name to hostname/ip/port."""
+        info = zeroconf.get_service_info(service_type, name, timeout=3000)
+        if not info:
+            return
+
+        addresses = info.parsed_addresses(IPVersion.V4Only)
+        if not addresses:
+            return
+
+        with self._lock:
+            self._peers[name] = {
+                'hostname': (info.server or name).rstrip('.').replace('.local', ''),
+                'ip': addresses[0],
+                'port': str(info.port),
+            }
+
+    # ============================================
+    # avahi-browse fallback
+    # ============================================
+
+    def _avahi_loop(self):
+        """Refresh the peer map from avahi-browse until stopped."""
+        while not self._stop_event.is_set():
+            peers = self._browse_avahi()
+            with self._lock:
+                self._peers = {peer['hostname']: peer for peer in peers}
+            self._stop_event.wait(AVAHI_REFRESH_SECONDS)
+
+    def _browse_avahi(self) -> List[dict]:
+        """One-shot peer scan using avahi-browse."""
+        peers = []
+        try:
+            result = subprocess.run(
+                ['avahi-browse', '-t', '-r', '-p', AVAHI_SERVICE_TYPE],
+                capture_output=True, timeout=5
+            )
+
+            for hostname, ip, port in _AVAHI_RESOLVED_RE.findall(result.stdout):
+                # Skip IPv6
+                if b':' in ip:
+                    continue
+
+                peers.append({
+                    'hostname': hostname.decode(errors='replace').replace('.local', ''),
+                    'ip': ip.decode(),
+                    'port': port.decode(),
+                })
+        except Exception:
+            pass
+
+        return peers
@@ -0,0 +1,73 @@
+# network/http_session.py
+"""
+Shared HTTP session for BeautiFi IoT backend communication.
+
+The verifier and registration backend live on the same host, so every
+client reuses one keep-alive connection pool instead of paying a TCP+TLS
+handshake per request.
+"""
+
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Connection pool sizing (one backend host, a handful of worker threads)
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+
+_shared_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def create_session(device_id: str) -> requests.Session:
+    """
+    Create an HTTP session with retry configuration and a keep-alive pool.
+
+    Args:
+        device_id: Device ID sent with every request
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+
+    # Configure retries for transient errors. GET only: a 5xx on a POST
+    # (registration, epoch submit) may already have been applied, and the
+    # verifier buffers failed POSTs for its own sync loop.
+    retry_strategy = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["GET"],
+    )
+
+    adapter = HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # Set default headers
+    session.headers.update({
+        "Content-Type": "application/json",
+        "X-Device-ID": device_id,
+        "User-Agent": f"BeautiFi-IoT/{device_id}",
+    })
+
+    return session
+
+
+def get_shared_session(device_id: str) -> requests.Session:
+    """Get the process-wide HTTP session, creating it on first use."""
+    global _shared_session
+    if _shared_session is None:
+        with _session_lock:
+            if _shared_session is None:
+                _shared_session = create_session(device_id)
+    return _shared_session
@@ -8,13 +8,14 @@ import json
 import time
 import threading
 import sqlite3
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Optional, Callable, List, Dict, Any
 from dataclasses import dataclass, field
 from enum import Enum
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+from .http_session import get_shared_session
 
 
 class ConnectionState(Enum):
@@ -38,6 +39,7 @@ class SyncStatus:
     epochs_pending: int = 0
     samples_sent_total: int = 0
     epochs_sent_total: int = 0
+    samples_dropped: int = 0
     retry_count: int = 0
     next_retry: Optional[datetime] = None
 
@@ -53,6 +55,7 @@ class SyncStatus:
             "epochs_pending": self.epochs_pending,
             "samples_sent_total": self.samples_sent_total,
             "epochs_sent_total": self.epochs_sent_total,
+            "samples_dropped": self.samples_dropped,
             "retry_count": self.retry_count,
             "next_retry": self.next_retry.isoformat() if self.next_retry else None,
             "is_online": self.connection_state == ConnectionState.CONNECTED,
@@ -81,6 +84,11 @@ class VerifierClient:
     MAX_BUFFERED_SAMPLES = 10000
     MAX_BUFFERED_EPOCHS = 100
 
+    # In-memory sample queue (drained by the flush thread)
+    MAX_QUEUED_SAMPLES = 1000
+    MAX_QUEUED_EPOCHS = 100
+    SAMPLE_FLUSH_INTERVAL_SECONDS = 1.0
+
     def __init__(
         self,
         verifier_url: str,
@@ -89,6 +97,7 @@ class VerifierClient:
         buffer_db_path: str = "sync_buffer.db",
         auto_sync: bool = True,
         sync_interval_seconds: int = 30,
+        batch_samples: bool = False,
     ):
         """
         Initialize the verifier client.
@@ -100,6 +109,8 @@ class VerifierClient:
             buffer_db_path: Path to SQLite database for offline buffering
             auto_sync: Enable automatic background sync
             sync_interval_seconds: How often to attempt sync of buffered data
+            batch_samples: Send queued samples to /api/telemetry/batch
+                (only if the verifier provides it)
         """
         self.verifier_url = verifier_url.rstrip('/')
         self.device_id = device_id
@@ -116,6 +127,15 @@ class VerifierClient:
         self._running = False
         self._sync_thread: Optional[threading.Thread] = None
 
+        # Queued samples, sent in batches off the caller's thread
+        self._sample_queue: deque = deque(maxlen=self.MAX_QUEUED_SAMPLES)
+        self._epoch_queue: deque = deque(maxlen=self.MAX_QUEUED_EPOCHS)
+        self._flush_thread: Optional[threading.Thread] = None
+
+        # Whether the verifier accepts /api/telemetry/batch (None = not probed yet).
+        # Off unless configured; samples go to /api/telemetry/stream one by one.
+        self._batch_supported: Optional[bool] = None if batch_samples else False
+
         # HTTP session with retry
         self._session = self._create_session()
 
@@ -129,30 +149,13 @@ class VerifierClient:
         print(f"[VERIFIER] Device ID: {self.device_id}")
 
     def _create_session(self) -> requests.Session:
-        """Create HTTP session with retry configuration."""
-        session = requests.Session()
-
-        # Configure retries for transient errors
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=0.5,
-            status_forcelist=[500, 502, 503, 504],
-            allowed_methods=["POST", "GET"],
-        )
-
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-
-        # Set default headers
-        session.headers.update({
-            "Content-Type": "application/json",
-            "X-Device-ID": self.device_id,
-            "User-Agent": f"BeautiFi-IoT/{self.device_id}",
-        })
+        """Get the shared HTTP session (keep-alive pool with retries)."""
+        session = get_shared_session(self.device_id)
 
+        # Auth is per-client, so send it per request instead of on the shared session
+        self._auth_headers = {}
         if self.api_key:
-            session.headers["Authorization"] = f"Bearer {self.api_key}"
+            self._auth_headers["Authorization"] = f"Bearer {self.api_key}"
 
         return session
 
@@ -161,6 +164,9 @@ class VerifierClient:
         conn = sqlite3.connect(self.buffer_db_path)
         cursor = conn.cursor()
 
+        # Persistent: buffered writes append to the WAL instead of a rollback journal
+        cursor.execute("PRAGMA journal_mode=WAL")
+
         # Pending samples table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS pending_samples (
@@ -250,6 +256,34 @@ class VerifierClient:
             self._buffer_sample(sample)
             return False
 
+    def queue_sample(self, sample: dict):
+        """
+        Queue a telemetry sample for the background flush thread.
+
+        Returns immediately; samples are sent in batches every
+        SAMPLE_FLUSH_INTERVAL_SECONDS and buffered to SQLite on failure.
+
+        Args:
+            sample: Signed telemetry sample
+        """
+        if len(self._sample_queue) == self.MAX_QUEUED_SAMPLES:
+            # deque(maxlen) drops the oldest on append; count it
+            with self._status_lock:
+                self.status.samples_dropped += 1
+        self._sample_queue.append(sample)
+
+    def queue_epoch(self, epoch: dict):
+        """
+        Queue a completed epoch for the background flush thread.
+
+        Returns immediately, so a slow verifier never stalls the caller
+        (the telemetry collector thread). Sent via send_epoch().
+
+        Args:
+            epoch: Signed epoch with Merkle root
+        """
+        self._epoch_queue.append(epoch)
+
     def send_epoch(self, epoch: dict) -> Optional[dict]:
         """
         Submit a completed epoch to the verifier.
@@ -332,6 +366,7 @@ class VerifierClient:
             response = self._session.post(
                 url,
                 json=sample,
+                headers=self._auth_headers,
                 timeout=10,
             )
 
@@ -351,6 +386,56 @@ class VerifierClient:
             self._record_error(f"Request error: {e}")
             return False
 
+    def _post_samples(self, samples: List[dict]) -> int:
+        """
+        POST samples in order, one request per sample.
+
+        With batch_samples enabled, sends them as one batch request instead,
+        falling back to per-sample posts if the batch endpoint is missing.
+
+        Returns:
+            Number of leading samples delivered (stops at the first failure)
+        """
+        if len(samples) > 1 and self._batch_supported is not False:
+            delivered = self._post_sample_batch(samples)
+            if delivered is not None:
+                return delivered
+
+        sent = 0
+        for sample in samples:
+            if not self._post_sample(sample):
+                break
+            sent += 1
+        return sent
+
+    def _post_sample_batch(self, samples: List[dict]) -> Optional[int]:
+        """POST samples in one request. Returns None if the endpoint doesn't exist."""
+        url = f"{self.verifier_url}/api/telemetry/batch"
+
+        try:
+            response = self._session.post(
+                url,
+                json={"samples": samples},
+                headers=self._auth_headers,
+                timeout=30,
+            )
+        except Exception as e:
+            self._record_error(f"Request error: {e}")
+            return 0
+
+        if response.status_code in (404, 405):
+            if self._batch_supported is None:
+                print("[VERIFIER] Batch endpoint not available, sending samples individually")
+            self._batch_supported = False
+            return None
+
+        if response.status_code == 200 or response.status_code == 201:
+            self._batch_supported = True
+            return len(samples)
+
+        self._record_error(f"HTTP {response.status_code}: {response.text[:100]}")
+        return 0
+
     def _post_epoch(self, epoch: dict) -> Optional[dict]:
         """POST an epoch to the verifier and return response."""
         url = f"{self.verifier_url}/api/epochs/submit"
@@ -359,6 +444,7 @@ class VerifierClient:
             response = self._session.post(
                 url,
                 json=epoch,
+                headers=self._auth_headers,
                 timeout=30,
             )
 
@@ -375,10 +461,6 @@ class VerifierClient:
             self._record_error("Request timeout")
             return None
         except Exception as e:
-            # Reset session on retry errors to clear cached error state
-            if "too many" in str(e).lower() or "max retries" in str(e).lower():
-                print("[VERIFIER] Resetting HTTP session due to retry exhaustion")
-                self._session = self._create_session()
             self._record_error(f"Request error: {e}")
             return None
 
@@ -387,7 +469,7 @@ class VerifierClient:
         url = f"{self.verifier_url}/api/device/{self.device_id}/status"
 
         try:
-            response = self._session.get(url, timeout=5)
+            response = self._session.get(url, headers=self._auth_headers, timeout=5)
             return response.status_code == 200
         except Exception:
             return False
@@ -415,6 +497,13 @@ class VerifierClient:
 
     def _buffer_sample(self, sample: dict):
         """Buffer a sample for later sync."""
+        self._buffer_samples([sample])
+
+    def _buffer_samples(self, samples: List[dict]):
+        """Buffer samples for later sync in a single transaction."""
+        if not samples:
+            return
+
         conn = sqlite3.connect(self.buffer_db_path)
         cursor = conn.cursor()
 
@@ -422,27 +511,29 @@ class VerifierClient:
         cursor.execute("SELECT COUNT(*) FROM pending_samples")
         count = cursor.fetchone()[0]
 
-        if count >= self.MAX_BUFFERED_SAMPLES:
+        overflow = count + len(samples) - self.MAX_BUFFERED_SAMPLES
+        if overflow > 0:
             # Remove oldest samples
             cursor.execute(f"""
                 DELETE FROM pending_samples WHERE id IN (
-                    SELECT id FROM pending_samples ORDER BY id ASC LIMIT {count - self.MAX_BUFFERED_SAMPLES + 1}
+                    SELECT id FROM pending_samples ORDER BY id ASC LIMIT {overflow}
                 )
             """)
 
-        cursor.execute("""
+        now = datetime.utcnow().isoformat()
+        cursor.executemany("""
             INSERT INTO pending_samples (timestamp, payload_json)
             VALUES (?, ?)
-        """, (
-            sample.get('timestamp', datetime.utcnow().isoformat()),
-            json.dumps(sample),
-        ))
+        """, [
+            (sample.get('timestamp', now), json.dumps(sample))
+            for sample in samples
+        ])
 
         conn.commit()
         conn.close()
 
         with self._status_lock:
-            self.status.samples_pending += 1
+            self.status.samples_pending += len(samples)
 
     def _buffer_epoch(self, epoch: dict):
         """Buffer an epoch for later sync."""
@@ -496,6 +587,8 @@ class VerifierClient:
         self._running = True
         self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
         self._sync_thread.start()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
         print(f"[VERIFIER] Background sync started (interval: {self.sync_interval_seconds}s)")
 
     def stop(self):
@@ -504,8 +597,58 @@ class VerifierClient:
         if self._sync_thread:
             self._sync_thread.join(timeout=5)
             self._sync_thread = None
+        if self._flush_thread:
+            self._flush_thread.join(timeout=5)
+            self._flush_thread = None
+
+        # Keep anything still queued for the next run
+        self._buffer_samples(self._drain_sample_queue())
+        while self._epoch_queue:
+            self._buffer_epoch(self._epoch_queue.popleft())
         print("[VERIFIER] Background sync stopped")
 
+    def _drain_sample_queue(self) -> List[dict]:
+        """Take everything currently queued."""
+        batch = []
+        while self._sample_queue:
+            batch.append(self._sample_queue.popleft())
+        return batch
+
+    def _flush_loop(self):
+        """Background loop to send queued samples and epochs in batches."""
+        while self._running:
+            time.sleep(self.SAMPLE_FLUSH_INTERVAL_SECONDS)
+            try:
+                self._flush_sample_queue()
+                while self._epoch_queue:
+                    self.send_epoch(self._epoch_queue.popleft())
+            except Exception as e:
+                print(f"[VERIFIER] Flush loop error: {e}")
+
+    def _flush_sample_queue(self):
+        """Send queued samples over the pooled connection, buffering the rest."""
+        batch = self._drain_sample_queue()
+        if not batch:
+            return
+
+        # Don't hammer the verifier while backing off; go straight to the buffer
+        with self._status_lock:
+            backing_off = self.status.next_retry and datetime.utcnow() < self.status.next_retry
+        if backing_off:
+            self._buffer_samples(batch)
+            return
+
+        sent = self._post_samples(batch)
+
+        if sent:
+            with self._status_lock:
+                self.status.last_sample_sent = datetime.utcnow()
+                self.status.samples_sent_total += sent
+                self.status.connection_state = ConnectionState.CONNECTED
+                self.status.retry_count = 0
+
+        self._buffer_samples(batch[sent:])
+
     def _sync_loop(self):
         """Background loop to sync buffered data."""
         while self._running:
@@ -561,18 +704,13 @@ class VerifierClient:
         if not rows:
             return
 
-        synced_ids = []
-
-        for row_id, payload_json in rows:
-            sample = json.loads(payload_json)
+        samples = [json.loads(payload_json) for _, payload_json in rows]
+        sent = self._post_samples(samples)
+        synced_ids = [row_id for row_id, _ in rows[:sent]]
 
-            if self._post_sample(sample):
-                synced_ids.append(row_id)
-                with self._status_lock:
-                    self.status.samples_sent_total += 1
-            else:
-                # Stop on first failure
-                break
+        if sent:
+            with self._status_lock:
+                self.status.samples_sent_total += sent
 
         # Remove synced samples
         if synced_ids:
@@ -152,8 +152,15 @@ class ConfigManager:
         with open(history_path, 'w') as f:
             json.dump(history_data, f, indent=2)
 
-    def _record_change(self, key: str, old_value: Any, new_value: Any, source: str):
-        """Record a configuration change."""
+    def _record_change(
+        self,
+        key: str,
+        old_value: Any,
+        new_value: Any,
+        source: str,
+        save: bool = True,
+    ):
+        """Record a configuration change (save=False defers the history write)."""
         change = ConfigChange(
             key=key,
             old_value=old_value,
@@ -162,7 +169,8 @@ class ConfigManager:
             source=source,
         )
         self._history.append(change)
-        self._save_history()
+        if save:
+            self._save_history()
 
     # ============================================
     # Validation
@@ -226,20 +234,32 @@ class ConfigManager:
         Returns:
             Tuple of (success, message)
         """
+        success, msg, changed = self._apply(key, value, source)
+        if changed:
+            self._save_config()
+            self._save_history()
+        return success, msg
+
+    def _apply(self, key: str, value: Any, source: str) -> Tuple[bool, str, bool]:
+        """
+        Validate and apply one value in memory, without writing to disk.
+
+        Returns:
+            Tuple of (success, message, changed)
+        """
         valid, error = self.validate_value(key, value)
         if not valid:
-            return False, error
+            return False, error, False
 
         old_value = self._config.get(key)
         if old_value == value:
-            return True, "Value unchanged"
+            return True, "Value unchanged", False
 
         self._config[key] = value
-        self._save_config()
-        self._record_change(key, old_value, value, source)
+        self._record_change(key, old_value, value, source, save=False)
 
         print(f"[CONFIG] {key}: {old_value} -> {value} (source: {source})")
-        return True, f"Updated {key}"
+        return True, f"Updated {key}", True
 
     def set_multiple(self, updates: Dict[str, Any], source: str = "local") -> Tuple[bool, Dict[str, str]]:
         """
@@ -254,13 +274,20 @@ class ConfigManager:
         """
         results = {}
         all_success = True
+        any_changed = False
 
         for key, value in updates.items():
-            success, msg = self.set(key, value, source)
+            success, msg, changed = self._apply(key, value, source)
             results[key] = msg
+            any_changed = any_changed or changed
             if not success:
                 all_success = False
 
+        # One config write and one history write for the whole batch
+        if any_changed:
+            self._save_config()
+            self._save_history()
+
         return all_success, results
 
     def reset_to_defaults(self) -> Dict[str, Any]:
@@ -272,9 +299,10 @@ class ConfigManager:
             new_value = rules["default"]
             if old_value != new_value:
                 self._config[key] = new_value
-                self._record_change(key, old_value, new_value, "reset")
+                self._record_change(key, old_value, new_value, "reset", save=False)
 
         self._save_config()
+        self._save_history()
         return old_config
 
     # ============================================
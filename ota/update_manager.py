@@ -109,6 +109,10 @@ class UpdateManager:
     UPDATE_DIR = Path.home() / ".beautifi" / "updates"
     BACKUP_DIR = Path.home() / ".beautifi" / "backups"
     STATE_FILE = "update_state.json"
+    HASH_CHUNK_SIZE = 64 * 1024
+
+    # Grace period between a successful install and the service restart
+    RESTART_DELAY_SECONDS = 2
 
     # Update manifest URL (configurable)
     DEFAULT_MANIFEST_URL = "https://raw.githubusercontent.com/ghapster/beautifi-iot/main/releases/latest.json"
@@ -118,6 +122,7 @@ class UpdateManager:
         app_dir: Optional[Path] = None,
         manifest_url: Optional[str] = None,
         trusted_public_key: Optional[str] = None,
+        session: Optional[requests.Session] = None,
     ):
         """
         Initialize update manager.
@@ -126,10 +131,12 @@ class UpdateManager:
             app_dir: Application directory to update (default: current directory)
             manifest_url: URL to fetch update manifest
             trusted_public_key: Ed25519 public key (hex) for verifying manifests
+            session: HTTP session to reuse (default: a dedicated keep-alive session)
         """
         self.app_dir = Path(app_dir) if app_dir else Path.cwd()
         self.manifest_url = manifest_url or self.DEFAULT_MANIFEST_URL
         self._trusted_public_key_hex = trusted_public_key
+        self._session = session or requests.Session()
 
         # State
         self._status = UpdateStatus.IDLE
@@ -301,7 +308,7 @@ class UpdateManager:
 
         try:
             # Fetch manifest
-            response = requests.get(self.manifest_url, timeout=30)
+            response = self._session.get(self.manifest_url, timeout=30)
             response.raise_for_status()
             manifest_data = response.json()
 
@@ -362,16 +369,20 @@ class UpdateManager:
             # Download file
             download_path = self.UPDATE_DIR / f"firmware-{manifest.version}.zip"
 
-            response = requests.get(manifest.download_url, stream=True, timeout=300)
+            response = self._session.get(manifest.download_url, stream=True, timeout=300)
             response.raise_for_status()
 
             total_size = manifest.file_size or int(response.headers.get('content-length', 0))
             downloaded = 0
 
+            # Hash while writing so verification doesn't re-read the file
+            sha256 = hashlib.sha256()
+
             with open(download_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+                for chunk in response.iter_content(chunk_size=self.HASH_CHUNK_SIZE):
                     if chunk:
                         f.write(chunk)
+                        sha256.update(chunk)
                         downloaded += len(chunk)
 
                         if total_size > 0:
@@ -384,7 +395,7 @@ class UpdateManager:
 
             # Verify hash
             self._set_status(UpdateStatus.VERIFYING)
-            file_hash = self._compute_file_hash(download_path)
+            file_hash = sha256.hexdigest()
 
             if file_hash != manifest.file_hash:
                 download_path.unlink()
@@ -400,9 +411,13 @@ class UpdateManager:
 
     def _compute_file_hash(self, file_path: Path) -> str:
         """Compute SHA-256 hash of a file."""
-        sha256 = hashlib.sha256()
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b''):
+            # Python 3.11+: hash in C without per-chunk Python round trips
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, "sha256").hexdigest()
+
+            sha256 = hashlib.sha256()
+            for chunk in iter(lambda: f.read(self.HASH_CHUNK_SIZE), b''):
                 sha256.update(chunk)
         return sha256.hexdigest()
 
@@ -593,16 +608,26 @@ class UpdateManager:
             return False, f"Installation failed: {e}"
 
     def _restart_application(self):
-        """Restart the application (Unix/systemd)."""
-        try:
-            # Try systemd first
-            subprocess.run(
-                ["sudo", "systemctl", "restart", "beautifi-iot"],
-                timeout=10,
-                check=False
-            )
-        except Exception:
-            print("[OTA] Could not restart via systemd")
+        """
+        Restart the application (Unix/systemd) shortly after returning.
+
+        The restart kills this process, so it is deferred: the caller's HTTP
+        response or command ack goes out first.
+        """
+        def restart():
+            try:
+                # Detached, so it isn't tied to the process being restarted
+                subprocess.Popen(
+                    ["sudo", "systemctl", "restart", "beautifi-iot"],
+                    start_new_session=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            except Exception:
+                print("[OTA] Could not restart via systemd")
+
+        print(f"[OTA] Restarting in {self.RESTART_DELAY_SECONDS}s...")
+        threading.Timer(self.RESTART_DELAY_SECONDS, restart).start()
 
     # ============================================
     # Full Update Flow
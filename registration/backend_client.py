@@ -10,6 +10,8 @@ from datetime import datetime, timezone
 from typing import Optional, Dict, Any, Tuple
 from dataclasses import dataclass
 
+from network.http_session import get_shared_session
+
 
 @dataclass
 class RegistrationResult:
@@ -62,13 +64,8 @@ class RegistrationClient:
         self.device_id = device_id
         self.timeout = timeout
 
-        # HTTP session
-        self._session = requests.Session()
-        self._session.headers.update({
-            "Content-Type": "application/json",
-            "X-Device-ID": device_id,
-            "User-Agent": f"BeautiFi-IoT/{device_id}",
-        })
+        # HTTP session (shared keep-alive pool with the verifier client)
+        self._session = get_shared_session(device_id)
 
         print(f"[REGISTER] Client initialized for {self.backend_url}")
 
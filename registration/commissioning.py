@@ -102,6 +102,10 @@ class CommissioningManager:
         self._registration_id: Optional[str] = None
         self._nft_binding: Optional[Dict[str, Any]] = None
 
+        # One lock for every state transition (re-entrant: transitions
+        # call _save_state/_notify_state_change while holding it)
+        self._lock = threading.RLock()
+
         # Calibration
         self._calibrating = False
         self._calibration_thread: Optional[threading.Thread] = None
@@ -243,28 +247,29 @@ class CommissioningManager:
         Returns:
             True if calibration started
         """
-        if self._calibrating:
-            print("[COMMISSION] Calibration already in progress")
-            return False
-
-        if self._state == CommissioningState.APPROVED:
-            print("[COMMISSION] Device already approved, cannot recalibrate")
-            return False
-
-        self._calibrating = True
-        self._calibration_samples = []
-        self._calibration_start = datetime.now(timezone.utc)
-        self._state = CommissioningState.CALIBRATING
-        self._save_state()
-        self._notify_state_change()
+        with self._lock:
+            if self._calibrating:
+                print("[COMMISSION] Calibration already in progress")
+                return False
+
+            if self._state == CommissioningState.APPROVED:
+                print("[COMMISSION] Device already approved, cannot recalibrate")
+                return False
+
+            self._calibrating = True
+            self._calibration_samples = []
+            self._calibration_start = datetime.now(timezone.utc)
+            self._state = CommissioningState.CALIBRATING
+            self._save_state()
+            self._notify_state_change()
 
-        # Start calibration thread
-        self._calibration_thread = threading.Thread(
-            target=self._calibration_loop,
-            args=(duration_minutes, sensor_reader),
-            daemon=True,
-        )
-        self._calibration_thread.start()
+            # Start calibration thread
+            self._calibration_thread = threading.Thread(
+                target=self._calibration_loop,
+                args=(duration_minutes, sensor_reader),
+                daemon=True,
+            )
+            self._calibration_thread.start()
 
         print(f"[COMMISSION] Calibration started ({duration_minutes} minutes)")
         return True
@@ -297,7 +302,8 @@ class CommissioningManager:
                 sample["calibration_sample"] = True
                 sample["sample_index"] = sample_count
 
-                self._calibration_samples.append(sample)
+                with self._lock:
+                    self._calibration_samples.append(sample)
 
                 # Store to database
                 cursor.execute("""
@@ -327,13 +333,15 @@ class CommissioningManager:
                 time.sleep(SAMPLE_INTERVAL_SECONDS)
 
             # Finalize calibration
-            self._finalize_calibration()
+            with self._lock:
+                self._finalize_calibration()
 
         except Exception as e:
             print(f"[COMMISSION] Calibration error: {e}")
-            self._state = CommissioningState.FAILED
-            self._save_state()
-            self._notify_state_change()
+            with self._lock:
+                self._state = CommissioningState.FAILED
+                self._save_state()
+                self._notify_state_change()
 
         finally:
             conn.close()
@@ -455,19 +463,22 @@ class CommissioningManager:
         Returns:
             True if registration submitted successfully
         """
-        if self._state not in [CommissioningState.CALIBRATION_COMPLETE, CommissioningState.FAILED]:
-            print(f"[COMMISSION] Cannot register in state: {self._state.value}")
-            return False
+        with self._lock:
+            if self._state not in [CommissioningState.CALIBRATION_COMPLETE, CommissioningState.FAILED]:
+                print(f"[COMMISSION] Cannot register in state: {self._state.value}")
+                return False
 
-        self._state = CommissioningState.REGISTERING
-        self._save_state()
-        self._notify_state_change()
+            self._state = CommissioningState.REGISTERING
+            self._save_state()
+            self._notify_state_change()
+
+            calibration_data = self._calibration_result.to_dict() if self._calibration_result else None
 
         # Generate manifest with calibration data
+        # (REGISTERING blocks re-entry, so the backend call runs without the lock)
         from .manifest import HardwareManifest
 
         manifest_gen = HardwareManifest(key_dir=self.key_dir)
-        calibration_data = self._calibration_result.to_dict() if self._calibration_result else None
         manifest = manifest_gen.generate(calibration_data=calibration_data)
         manifest_gen.save()
 
@@ -482,25 +493,26 @@ class CommissioningManager:
             **kwargs
         )
 
-        if result.success:
-            self._registration_id = result.registration_id
-            self._nft_binding = {
-                "wallet_address": wallet_address,
-                "registration_id": result.registration_id,
-                "status": "pending",
-            }
-            self._state = CommissioningState.PENDING_APPROVAL
-            self._save_state()
-            self._notify_state_change()
-
-            print(f"[COMMISSION] Registration submitted: {result.registration_id}")
-            return True
-        else:
-            print(f"[COMMISSION] Registration failed: {result.error}")
-            self._state = CommissioningState.FAILED
-            self._save_state()
-            self._notify_state_change()
-            return False
+        with self._lock:
+            if result.success:
+                self._registration_id = result.registration_id
+                self._nft_binding = {
+                    "wallet_address": wallet_address,
+                    "registration_id": result.registration_id,
+                    "status": "pending",
+                }
+                self._state = CommissioningState.PENDING_APPROVAL
+                self._save_state()
+                self._notify_state_change()
+
+                print(f"[COMMISSION] Registration submitted: {result.registration_id}")
+                return True
+            else:
+                print(f"[COMMISSION] Registration failed: {result.error}")
+                self._state = CommissioningState.FAILED
+                self._save_state()
+                self._notify_state_change()
+                return False
 
     def check_approval(self, backend_client) -> bool:
         """
@@ -512,16 +524,23 @@ class CommissioningManager:
         Returns:
             True if approved
         """
-        if not self._nft_binding or not self._nft_binding.get("wallet_address"):
-            return False
+        with self._lock:
+            if not self._nft_binding or not self._nft_binding.get("wallet_address"):
+                return False
+            wallet_address = self._nft_binding["wallet_address"]
 
-        nft_info = backend_client.get_nft_binding(self._nft_binding["wallet_address"])
+        nft_info = backend_client.get_nft_binding(wallet_address)
 
         if nft_info and nft_info.get("status") == "approved":
-            self._nft_binding.update(nft_info)
-            self._state = CommissioningState.APPROVED
-            self._save_state()
-            self._notify_state_change()
+            with self._lock:
+                # Reset while we were waiting on the backend
+                if not self._nft_binding:
+                    return False
+
+                self._nft_binding.update(nft_info)
+                self._state = CommissioningState.APPROVED
+                self._save_state()
+                self._notify_state_change()
 
             print(f"[COMMISSION] Device approved! NFT Token ID: {nft_info.get('nft_token_id')}")
             return True
@@ -534,51 +553,54 @@ class CommissioningManager:
 
     def get_status(self) -> Dict[str, Any]:
         """Get commissioning status summary."""
-        status = {
-            "state": self._state.value,
-            "device_id": DEVICE_ID,
-            "registration_id": self._registration_id,
-        }
-
-        if self._calibrating:
-            status["calibration_progress"] = {
-                "samples_collected": len(self._calibration_samples),
-                "started_at": self._calibration_start.isoformat() if self._calibration_start else None,
+        with self._lock:
+            status = {
+                "state": self._state.value,
+                "device_id": DEVICE_ID,
+                "registration_id": self._registration_id,
             }
 
-        if self._calibration_result:
-            status["calibration"] = {
-                "passed": self._calibration_result.passed,
-                "sample_count": self._calibration_result.sample_count,
-                "duration_minutes": self._calibration_result.duration_minutes,
-                "issues": self._calibration_result.issues,
-            }
+            if self._calibrating:
+                status["calibration_progress"] = {
+                    "samples_collected": len(self._calibration_samples),
+                    "started_at": self._calibration_start.isoformat() if self._calibration_start else None,
+                }
 
-        if self._nft_binding:
-            status["nft_binding"] = self._nft_binding
+            if self._calibration_result:
+                status["calibration"] = {
+                    "passed": self._calibration_result.passed,
+                    "sample_count": self._calibration_result.sample_count,
+                    "duration_minutes": self._calibration_result.duration_minutes,
+                    "issues": self._calibration_result.issues,
+                }
+
+            if self._nft_binding:
+                status["nft_binding"] = dict(self._nft_binding)
 
         return status
 
     def reset(self):
         """Reset commissioning state (for re-registration)."""
+        # Join the calibration thread before taking the lock it also uses
         if self._calibrating:
             self.stop_calibration()
 
-        self._state = CommissioningState.NOT_STARTED
-        self._calibration_result = None
-        self._registration_id = None
-        self._nft_binding = None
-        self._calibration_samples = []
-
-        # Clear database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM commissioning_state")
-        cursor.execute("DELETE FROM calibration_samples")
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._state = CommissioningState.NOT_STARTED
+            self._calibration_result = None
+            self._registration_id = None
+            self._nft_binding = None
+            self._calibration_samples = []
+
+            # Clear database
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM commissioning_state")
+            cursor.execute("DELETE FROM calibration_samples")
+            conn.commit()
+            conn.close()
 
-        self._notify_state_change()
+            self._notify_state_change()
         print("[COMMISSION] State reset")
 
 
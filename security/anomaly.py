@@ -183,6 +183,7 @@ class AnomalyDetector:
 
         # Thread safety
         self._lock = threading.Lock()
+        self._db_local = threading.local()
 
         # Anomaly counts
         self._anomaly_counts: Dict[str, int] = {t.value: 0 for t in AnomalyType}
@@ -193,9 +194,19 @@ class AnomalyDetector:
 
         print(f"[SECURITY] Anomaly detector initialized (sigma={sigma_threshold})")
 
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection to the anomaly database (opened once, reused)."""
+        conn = getattr(self._db_local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._db_local.conn = conn
+        return conn
+
     def _init_db(self):
         """Initialize SQLite database for anomaly logging."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -227,34 +238,33 @@ class AnomalyDetector:
         """)
 
         conn.commit()
-        conn.close()
 
-    def _log_anomaly(self, report: AnomalyReport):
-        """Log an anomaly to the database."""
-        if not self.enable_logging:
+    def _log_anomalies(self, reports: List[AnomalyReport]):
+        """Log a sample's anomalies to the database in one transaction."""
+        if not self.enable_logging or not reports:
             return
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        conn = self._connect()
+        conn.executemany("""
             INSERT INTO anomalies (
                 timestamp, anomaly_type, severity, field, value,
                 expected_range, message, sample_hash
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            report.timestamp,
-            report.anomaly_type.value,
-            report.severity.value,
-            report.field,
-            json.dumps(report.value),
-            json.dumps(report.expected_range) if report.expected_range else None,
-            report.message,
-            report.sample_hash,
-        ))
+        """, [
+            (
+                report.timestamp,
+                report.anomaly_type.value,
+                report.severity.value,
+                report.field,
+                json.dumps(report.value),
+                json.dumps(report.expected_range) if report.expected_range else None,
+                report.message,
+                report.sample_hash,
+            )
+            for report in reports
+        ])
 
         conn.commit()
-        conn.close()
 
     def _extract_values(self, sample: dict) -> Dict[str, float]:
         """Extract tracked values from a telemetry sample."""
@@ -351,9 +361,9 @@ class AnomalyDetector:
                 anomalies.extend(consistency_anomalies)
 
             # Log anomalies
+            self._log_anomalies(anomalies)
             for anomaly in anomalies:
                 self._anomaly_counts[anomaly.anomaly_type.value] += 1
-                self._log_anomaly(anomaly)
 
                 # Print warnings/criticals
                 if anomaly.severity in [AnomalySeverity.WARNING, AnomalySeverity.CRITICAL]:
@@ -594,7 +604,7 @@ class AnomalyDetector:
         if not self.enable_logging:
             return []
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         cursor.execute("""
@@ -604,7 +614,6 @@ class AnomalyDetector:
         """, (limit,))
 
         rows = cursor.fetchall()
-        conn.close()
 
         return [
             {
@@ -623,7 +632,7 @@ class AnomalyDetector:
         if not self.enable_logging:
             return
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         with self._lock:
@@ -643,19 +652,17 @@ class AnomalyDetector:
                 ))
 
         conn.commit()
-        conn.close()
 
     def load_baselines(self):
         """Load baselines from database."""
         if not self.enable_logging:
             return
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         cursor.execute("SELECT field, count, mean, std_dev, min_val, max_val FROM baselines")
         rows = cursor.fetchall()
-        conn.close()
 
         with self._lock:
             for row in rows:
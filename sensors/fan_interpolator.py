@@ -4,6 +4,8 @@ Fan performance interpolation based on AC Infinity Cloudline S6 specs.
 Converts PWM duty cycle (0-100%) to CFM, RPM, and Watts.
 """
 
+from bisect import bisect_left
+
 from config import FAN_SPECS, FAN_CFM_CURVE, FAN_POWER_CURVE, FAN_RPM_CURVE
 
 
@@ -16,35 +18,45 @@ class FanInterpolator:
         self.power_curve = FAN_POWER_CURVE
         self.rpm_curve = FAN_RPM_CURVE
 
-    def _interpolate(self, curve: dict, pwm_percent: float) -> float:
+        # Curves are fixed, so sort their points once and bisect per lookup
+        self._cfm_points = self._prepare_curve(self.cfm_curve)
+        self._power_points = self._prepare_curve(self.power_curve)
+        self._rpm_points = self._prepare_curve(self.rpm_curve)
+
+        # Slider and command speeds are whole percents: precompute those 101 rows
+        self._metrics_by_pwm = {pwm: self._compute_metrics(pwm) for pwm in range(101)}
+
+    @staticmethod
+    def _prepare_curve(curve: dict) -> tuple:
+        """Split a curve dict into sorted (points, values) lists."""
+        points = sorted(curve)
+        return points, [curve[p] for p in points]
+
+    def _interpolate(self, curve: tuple, pwm_percent: float) -> float:
         """
         Linear interpolation between curve points.
 
         Args:
-            curve: Dict mapping PWM % -> multiplier (0.0 to 1.0)
+            curve: Sorted (points, values) from _prepare_curve
             pwm_percent: Current PWM duty cycle (0-100)
 
         Returns:
             Interpolated multiplier
         """
+        points, values = curve
         pwm = max(0, min(100, pwm_percent))
 
-        # Find surrounding points
-        points = sorted(curve.keys())
+        # Find upper bound; lower bound is the point before it
+        i = bisect_left(points, pwm)
 
-        if pwm in curve:
-            return curve[pwm]
-
-        # Find lower and upper bounds
-        lower = max([p for p in points if p <= pwm], default=0)
-        upper = min([p for p in points if p >= pwm], default=100)
-
-        if lower == upper:
-            return curve[lower]
+        if i == len(points):
+            return values[-1]
+        if points[i] == pwm or i == 0:
+            return values[i]
 
         # Linear interpolation
-        lower_val = curve[lower]
-        upper_val = curve[upper]
+        lower, upper = points[i - 1], points[i]
+        lower_val, upper_val = values[i - 1], values[i]
         ratio = (pwm - lower) / (upper - lower)
 
         return lower_val + (upper_val - lower_val) * ratio
@@ -59,7 +71,7 @@ class FanInterpolator:
         Returns:
             Estimated CFM
         """
-        multiplier = self._interpolate(self.cfm_curve, pwm_percent)
+        multiplier = self._interpolate(self._cfm_points, pwm_percent)
         return round(self.specs["max_cfm"] * multiplier, 1)
 
     def get_rpm(self, pwm_percent: float) -> int:
@@ -72,7 +84,7 @@ class FanInterpolator:
         Returns:
             Estimated RPM
         """
-        multiplier = self._interpolate(self.rpm_curve, pwm_percent)
+        multiplier = self._interpolate(self._rpm_points, pwm_percent)
         return int(self.specs["max_rpm"] * multiplier)
 
     def get_watts(self, pwm_percent: float) -> float:
@@ -85,19 +97,32 @@ class FanInterpolator:
         Returns:
             Estimated watts
         """
-        multiplier = self._interpolate(self.power_curve, pwm_percent)
+        multiplier = self._interpolate(self._power_points, pwm_percent)
         return round(self.specs["max_watts"] * multiplier, 1)
 
     def get_all_metrics(self, pwm_percent: float) -> dict:
         """
         Get all interpolated fan metrics.
 
+        Whole-percent duty cycles are served from a precomputed table; the
+        returned dict may be shared, so treat it as read-only.
+
         Args:
             pwm_percent: PWM duty cycle (0-100)
 
         Returns:
             Dict with cfm, rpm, watts, and efficiency
         """
+        # 50.0 hashes like 50, so integral floats hit the table too
+        row = self._metrics_by_pwm.get(pwm_percent)
+        if row is not None:
+            if type(pwm_percent) is int:
+                return row
+            return {**row, "pwm_percent": pwm_percent}
+        return self._compute_metrics(pwm_percent)
+
+    def _compute_metrics(self, pwm_percent: float) -> dict:
+        """Interpolate cfm, rpm, watts, and efficiency for one duty cycle."""
         cfm = self.get_cfm(pwm_percent)
         watts = self.get_watts(pwm_percent)
         rpm = self.get_rpm(pwm_percent)
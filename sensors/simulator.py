@@ -6,6 +6,7 @@ Generates realistic mock data for VOC, temperature, humidity, CO2, etc.
 
 import random
 import math
+import threading
 import time
 from datetime import datetime
 from typing import Optional
@@ -44,6 +45,9 @@ class SimulatedSensors:
         self._in_spike = False
         self._spike_duration = 0
 
+        # One instance is shared by the collector, API and calibration threads
+        self._lock = threading.Lock()
+
     def _add_noise(self, value: float, noise_range: float) -> float:
         """Add Gaussian noise to a value."""
         return value + random.gauss(0, noise_range / 2)
@@ -164,16 +168,19 @@ class SimulatedSensors:
         cfm = fan_metrics["cfm"]
 
         # Generate simulated environmental readings
-        voc = self._simulate_voc(cfm)
-        temp = self._simulate_temperature()
-        humidity = self._simulate_humidity()
-        co2 = self._simulate_co2(cfm)
-        delta_p = self._simulate_pressure(cfm)
-        pm25 = self._simulate_pm25(cfm)
+        with self._lock:
+            voc = self._simulate_voc(cfm)
+            temp = self._simulate_temperature()
+            humidity = self._simulate_humidity()
+            co2 = self._simulate_co2(cfm)
+            delta_p = self._simulate_pressure(cfm)
+            pm25 = self._simulate_pm25(cfm)
+            voc_level = self._voc_level
+            in_spike = self._in_spike
 
         # Calculate VOC reduction (compared to no-ventilation baseline)
         voc_reduction_pct = 0
-        if cfm > 0 and self._voc_level < self.config["voc_baseline_ppb"] + self.config["voc_spike_magnitude"]:
+        if cfm > 0 and voc_level < self.config["voc_baseline_ppb"] + self.config["voc_spike_magnitude"]:
             potential_max = self.config["voc_baseline_ppb"] + self.config["voc_spike_magnitude"]
             voc_reduction_pct = round((potential_max - voc) / potential_max * 100, 1)
 
@@ -217,8 +224,8 @@ class SimulatedSensors:
 
             # Simulation state (for debugging)
             "_sim_state": {
-                "in_spike": self._in_spike,
-                "internal_voc": round(self._voc_level, 1),
+                "in_spike": in_spike,
+                "internal_voc": round(voc_level, 1),
             }
         }
 
@@ -9,6 +9,7 @@ import threading
 import time
 import json
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Callable, Optional, List
 from pathlib import Path
@@ -87,6 +88,78 @@ except ImportError as e:
     PressureBalanceTracker = None
 
 
+class CallbackBus:
+    """Sample and epoch subscribers, kept as two flat lists for cheap dispatch."""
+
+    __slots__ = ("samples", "epochs")
+
+    def __init__(self):
+        self.samples: List[Callable[[dict], None]] = []
+        self.epochs: List[Callable[[dict], None]] = []
+
+    @staticmethod
+    def dispatch(callbacks: List[Callable[[dict], None]], payload: dict, kind: str):
+        """Call each subscriber; one failing callback doesn't starve the rest."""
+        for callback in callbacks:
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"[WARN] {kind} callback error: {e}")
+
+
+class EpochAccumulator:
+    """Running sums for the epoch summary, updated as each sample is collected."""
+
+    __slots__ = (
+        "count", "max_tvoc",
+        "tvoc", "eco2", "pm25", "temp", "humidity", "pressure",
+        "cfm", "rpm", "watts", "efficiency",
+        "tar", "energy", "voc_reduction",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear all sums for a new epoch."""
+        self.count = 0
+        self.max_tvoc = 0
+        self.tvoc = self.eco2 = self.pm25 = self.temp = self.humidity = self.pressure = 0
+        self.cfm = self.rpm = self.watts = self.efficiency = 0
+        self.tar = self.energy = self.voc_reduction = 0
+
+    def add(self, sample: dict):
+        """Fold one sample into the sums (v1 field names, legacy fallbacks)."""
+        env = sample["environment"]
+        fan = sample["fan"]
+        derived = sample["derived"]
+
+        tvoc = env.get("voc_ppb", env.get("tvoc_ppb", 0))
+        if self.count == 0 or tvoc > self.max_tvoc:
+            self.max_tvoc = tvoc
+        self.count += 1
+
+        self.tvoc += tvoc
+        self.eco2 += env.get("co2_ppm", env.get("eco2_ppm", 0))
+        self.pm25 += env.get("pm25_ugm3", 0)
+        self.temp += env.get("temperature_c", env.get("temp_c", 0))
+        self.humidity += env.get("humidity_pct", 0)
+        self.pressure += env.get("delta_p_pa", env.get("dp_pa", 0))
+
+        self.cfm += fan["cfm"]
+        self.rpm += fan.get("rpm", 0)
+        self.watts += fan.get("watts", fan.get("power_w", 0))
+        self.efficiency += fan.get("efficiency_cfm_w", 0)
+
+        self.tar += derived["tar_cfm_min"]
+        self.energy += derived["energy_wh"]
+        self.voc_reduction += derived.get("voc_reduction_pct", 0)
+
+    def mean(self, total: float) -> float:
+        """Average of one running sum over the samples seen so far."""
+        return total / self.count if self.count else 0
+
+
 class TelemetryCollector:
     """
     Background service that collects telemetry at regular intervals.
@@ -106,6 +179,7 @@ class TelemetryCollector:
         enable_signing: bool = True,
         enable_anomaly_detection: bool = True,
         enable_evidence_packs: bool = True,
+        sensors: Optional[SimulatedSensors] = None,
     ):
         """
         Initialize the telemetry collector.
@@ -115,6 +189,7 @@ class TelemetryCollector:
             pwm_getter: Callback function that returns current PWM (0-100)
             enable_signing: Enable cryptographic signing of samples/epochs
             enable_anomaly_detection: Enable anomaly detection on samples
+            sensors: Shared sensor source (created here if not given)
         """
         self.db_path = db_path
         self.pwm_getter = pwm_getter or (lambda: 0)
@@ -188,11 +263,15 @@ class TelemetryCollector:
                 print(f"[WARN] Failed to initialize verifier client: {e}")
 
         # Initialize sensors (simulation or real based on config)
-        self.fan_interpolator = FanInterpolator()
-        if SIMULATION_MODE:
+        if sensors is not None:
+            self.sensors = sensors
+            self.fan_interpolator = sensors.fan
+        elif SIMULATION_MODE:
+            self.fan_interpolator = FanInterpolator()
             self.sensors = SimulatedSensors(self.fan_interpolator)
         else:
             # TODO: Initialize real sensors when available
+            self.fan_interpolator = FanInterpolator()
             self.sensors = SimulatedSensors(self.fan_interpolator)
 
         # Initialize pressure balance tracker
@@ -212,16 +291,19 @@ class TelemetryCollector:
         self._running = False
         self._thread: Optional[threading.Thread] = None
         self._lock = threading.Lock()
+        # Epoch signing, evidence packs and uploads run here, off the sampling thread
+        self._epoch_worker: Optional[ThreadPoolExecutor] = None
 
         # Callbacks for real-time data
-        self._callbacks: List[Callable[[dict], None]] = []
-        self._epoch_callback: Optional[Callable[[dict], None]] = None
+        self._bus = CallbackBus()
 
         # Current epoch tracking
         self._current_epoch_start: Optional[datetime] = None
         self._current_epoch_samples: List[dict] = []
+        self._epoch_accum = EpochAccumulator()
 
-        # Initialize database
+        # Initialize database (one cached connection per thread)
+        self._db_local = threading.local()
         self._init_db()
 
     def _get_local_ip(self):
@@ -241,11 +323,31 @@ class TelemetryCollector:
         except Exception:
             return self._cached_ip
 
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection to the telemetry database.
+
+        Connections are opened once per thread and reused, so the collector
+        and API threads don't reopen the file for every sample and query.
+        """
+        conn = getattr(self._db_local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            # WAL is persistent (set in _init_db); NORMAL only fsyncs at checkpoints
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._db_local.conn = conn
+        return conn
+
     def _init_db(self):
         """Initialize SQLite database for telemetry buffering."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
+        # Readers never block the writer, and commits append to the WAL
+        # instead of rewriting a rollback journal on the SD card
+        cursor.execute("PRAGMA journal_mode=WAL")
+
         # Telemetry samples table (with signing columns)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS samples (
@@ -314,7 +416,6 @@ class TelemetryCollector:
             pass
 
         conn.commit()
-        conn.close()
 
     def _sign_sample(self, sample: dict) -> dict:
         """Sign a telemetry sample if signing is enabled."""
@@ -330,7 +431,7 @@ class TelemetryCollector:
 
     def _store_sample(self, sample: dict):
         """Store a telemetry sample in the database."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         # Extract signing info if present
@@ -364,24 +465,18 @@ class TelemetryCollector:
             json.dumps(sample),
         ))
 
-        conn.commit()
+        # Cleanup old samples if buffer is full, in the same transaction.
+        # Ids only grow and the oldest are pruned first, so an id cutoff
+        # replaces a COUNT(*) scan.
+        cutoff = cursor.lastrowid - TELEMETRY_BUFFER_SIZE
+        if cutoff > 0:
+            cursor.execute("DELETE FROM samples WHERE id <= ?", (cutoff,))
 
-        # Cleanup old samples if buffer is full
-        cursor.execute("SELECT COUNT(*) FROM samples")
-        count = cursor.fetchone()[0]
-        if count > TELEMETRY_BUFFER_SIZE:
-            cursor.execute(f"""
-                DELETE FROM samples WHERE id IN (
-                    SELECT id FROM samples ORDER BY id ASC LIMIT {count - TELEMETRY_BUFFER_SIZE}
-                )
-            """)
-            conn.commit()
-
-        conn.close()
+        conn.commit()
 
     def _store_epoch(self, epoch: dict):
         """Store a completed epoch in the database."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         # Extract signing info if present
@@ -437,7 +532,6 @@ class TelemetryCollector:
         ))
 
         conn.commit()
-        conn.close()
 
     def _check_epoch(self, sample: dict):
         """Check if current epoch is complete and form new one if needed."""
@@ -447,21 +541,40 @@ class TelemetryCollector:
         if self._current_epoch_start is None:
             self._current_epoch_start = sample_time
             self._current_epoch_samples = []
+            self._epoch_accum = EpochAccumulator()
 
         self._current_epoch_samples.append(sample)
+        self._epoch_accum.add(sample)
 
         # Check if epoch is complete
         elapsed = sample_time - self._current_epoch_start
         if elapsed >= timedelta(minutes=EPOCH_DURATION_MINUTES):
-            self._finalize_epoch()
+            self._close_epoch()
 
-    def _finalize_epoch(self):
-        """Finalize the current epoch, sign it, and store it."""
+    def _close_epoch(self):
+        """Hand the current epoch to the epoch worker and start a fresh one."""
         if not self._current_epoch_samples:
             return
 
-        samples = self._current_epoch_samples
-        start_time = self._current_epoch_start
+        args = (self._current_epoch_samples, self._current_epoch_start, self._epoch_accum)
+        self._current_epoch_start = None
+        self._current_epoch_samples = []
+        self._epoch_accum = EpochAccumulator()
+
+        if self._epoch_worker is not None:
+            self._epoch_worker.submit(self._finalize_epoch_logged, *args)
+        else:
+            self._finalize_epoch(*args)
+
+    def _finalize_epoch_logged(self, *args):
+        """Run _finalize_epoch on the worker, where an exception would otherwise vanish."""
+        try:
+            self._finalize_epoch(*args)
+        except Exception as e:
+            print(f"[ERR] Epoch finalization error: {e}")
+
+    def _finalize_epoch(self, samples: List[dict], start_time: datetime, acc: EpochAccumulator):
+        """Finalize a closed epoch, sign it, and store it."""
         end_time = datetime.fromisoformat(
             samples[-1]["timestamp"].replace("Z", "+00:00")
         )
@@ -469,38 +582,23 @@ class TelemetryCollector:
         # Calculate duration in minutes
         duration_minutes = (end_time - start_time).total_seconds() / 60
 
-        # Air quality aggregations
-        voc_values = [s["environment"].get("voc_ppb", s["environment"].get("tvoc_ppb", 0)) for s in samples]
-        co2_values = [s["environment"].get("co2_ppm", s["environment"].get("eco2_ppm", 0)) for s in samples]
-        pm25_values = [s["environment"].get("pm25_ugm3", 0) for s in samples]
-        temp_values = [s["environment"].get("temperature_c", s["environment"].get("temp_c", 0)) for s in samples]
-        humidity_values = [s["environment"].get("humidity_pct", 0) for s in samples]
-        pressure_values = [s["environment"].get("delta_p_pa", s["environment"].get("dp_pa", 0)) for s in samples]
-
-        avg_tvoc = sum(voc_values) / len(voc_values) if voc_values else 0
-        max_tvoc = max(voc_values) if voc_values else 0
-        avg_eco2 = sum(co2_values) / len(co2_values) if co2_values else 0
-        avg_pm25 = sum(pm25_values) / len(pm25_values) if pm25_values else 0
-        avg_temp = sum(temp_values) / len(temp_values) if temp_values else 0
-        avg_humidity = sum(humidity_values) / len(humidity_values) if humidity_values else 0
-        avg_pressure = sum(pressure_values) / len(pressure_values) if pressure_values else 0
-
-        # Fan performance aggregations
-        cfm_values = [s["fan"]["cfm"] for s in samples]
-        rpm_values = [s["fan"].get("rpm", 0) for s in samples]
-        watts_values = [s["fan"].get("watts", s["fan"].get("power_w", 0)) for s in samples]
-        efficiency_values = [s["fan"].get("efficiency_cfm_w", 0) for s in samples]
-
-        avg_cfm = sum(cfm_values) / len(cfm_values) if cfm_values else 0
-        avg_rpm = sum(rpm_values) / len(rpm_values) if rpm_values else 0
-        avg_watts = sum(watts_values) / len(watts_values) if watts_values else 0
-        avg_efficiency = sum(efficiency_values) / len(efficiency_values) if efficiency_values else 0
-
-        # Mitigation metrics
-        total_tar = sum(s["derived"]["tar_cfm_min"] for s in samples)
-        total_energy = sum(s["derived"]["energy_wh"] for s in samples)
-        voc_reduction_values = [s["derived"].get("voc_reduction_pct", 0) for s in samples]
-        avg_voc_reduction = sum(voc_reduction_values) / len(voc_reduction_values) if voc_reduction_values else 0
+        # Summary sums were accumulated as samples arrived
+        avg_tvoc = acc.mean(acc.tvoc)
+        max_tvoc = acc.max_tvoc
+        avg_eco2 = acc.mean(acc.eco2)
+        avg_pm25 = acc.mean(acc.pm25)
+        avg_temp = acc.mean(acc.temp)
+        avg_humidity = acc.mean(acc.humidity)
+        avg_pressure = acc.mean(acc.pressure)
+
+        avg_cfm = acc.mean(acc.cfm)
+        avg_rpm = acc.mean(acc.rpm)
+        avg_watts = acc.mean(acc.watts)
+        avg_efficiency = acc.mean(acc.efficiency)
+
+        total_tar = acc.tar
+        total_energy = acc.energy
+        avg_voc_reduction = acc.mean(acc.voc_reduction)
 
         # Build epoch data in v1 spec format
         epoch_id = f"ep-{start_time.strftime('%Y%m%d%H')}-{DEVICE_ID}"
@@ -627,16 +725,9 @@ class TelemetryCollector:
             except Exception as e:
                 print(f"[WARN] Verifier submission error: {e}")
 
-        # Notify epoch callback
-        if self._epoch_callback:
-            try:
-                self._epoch_callback(epoch)
-            except Exception as e:
-                print(f"[WARN] Epoch callback error: {e}")
-
-        # Reset for next epoch
-        self._current_epoch_start = None
-        self._current_epoch_samples = []
+        # Notify epoch callbacks
+        if self._bus.epochs:
+            CallbackBus.dispatch(self._bus.epochs, epoch, "Epoch")
 
     def _collection_loop(self):
         """Main collection loop running in background thread."""
@@ -692,11 +783,8 @@ class TelemetryCollector:
                 self._check_epoch(sample)
 
                 # Notify callbacks
-                for callback in self._callbacks:
-                    try:
-                        callback(sample)
-                    except Exception as e:
-                        print(f"[WARN] Callback error: {e}")
+                if self._bus.samples:
+                    CallbackBus.dispatch(self._bus.samples, sample, "Sample")
 
                 # Log periodically (include signature and anomaly status)
                 sig_indicator = "[S]" if '_signing' in sample else ""
@@ -716,6 +804,7 @@ class TelemetryCollector:
             return
 
         self._running = True
+        self._epoch_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="epoch")
         self._thread = threading.Thread(target=self._collection_loop, daemon=True)
         self._thread.start()
 
@@ -726,9 +815,11 @@ class TelemetryCollector:
             self._thread.join(timeout=5)
             self._thread = None
 
-        # Finalize any partial epoch
-        if self._current_epoch_samples:
-            self._finalize_epoch()
+        # Finalize any partial epoch, then let queued epochs finish
+        self._close_epoch()
+        if self._epoch_worker is not None:
+            self._epoch_worker.shutdown(wait=True)
+            self._epoch_worker = None
 
         # Save anomaly baselines
         if self._anomaly_detector:
@@ -742,21 +833,24 @@ class TelemetryCollector:
 
     def add_callback(self, callback: Callable[[dict], None]):
         """Add a callback function to receive real-time samples."""
-        self._callbacks.append(callback)
+        self._bus.samples.append(callback)
 
     def remove_callback(self, callback: Callable[[dict], None]):
         """Remove a callback function."""
-        if callback in self._callbacks:
-            self._callbacks.remove(callback)
+        if callback in self._bus.samples:
+            self._bus.samples.remove(callback)
+
+    def add_epoch_callback(self, callback: Callable[[dict], None]):
+        """Add a callback function to receive completed epochs."""
+        self._bus.epochs.append(callback)
 
-    def set_epoch_callback(self, callback: Callable[[dict], None]):
-        """Set callback function for completed epochs."""
-        self._epoch_callback = callback
+    def set_epoch_callback(self, callback: Optional[Callable[[dict], None]]):
+        """Set the callback function for completed epochs (replaces any others)."""
+        self._bus.epochs[:] = [callback] if callback else []
 
     def get_recent_samples(self, limit: int = 100) -> List[dict]:
         """Get recent samples from the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._connect().cursor()
 
         cursor.execute("""
             SELECT raw_json FROM samples
@@ -764,14 +858,12 @@ class TelemetryCollector:
         """, (limit,))
 
         rows = cursor.fetchall()
-        conn.close()
 
         return [json.loads(row[0]) for row in reversed(rows)]
 
     def get_recent_epochs(self, limit: int = 24) -> List[dict]:
         """Get recent epochs from the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._connect().cursor()
 
         cursor.execute("""
             SELECT summary_json FROM epochs
@@ -779,7 +871,6 @@ class TelemetryCollector:
         """, (limit,))
 
         rows = cursor.fetchall()
-        conn.close()
 
         return [json.loads(row[0]) for row in reversed(rows)]
 
@@ -1,9 +1,12 @@
 import subprocess
 
+# Same bound the provisioner uses, so a hung nmcli can't hold a worker forever
+CONNECT_TIMEOUT_SECONDS = 60
+
 def apply_wifi_settings(ssid, password):
     try:
         cmd = ["nmcli", "device", "wifi", "connect", ssid, "password", password]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=CONNECT_TIMEOUT_SECONDS)
 
         if result.returncode == 0:
             print("✅ Wi-Fi connection added.")
@@ -5,6 +5,7 @@ Handles AP (hotspot) mode for initial setup and switching to client mode.
 """
 
 import subprocess
+import threading
 import time
 import os
 from pathlib import Path
@@ -51,6 +52,7 @@ class WiFiProvisioning:
         self._connection_error = None
         self._connection_ip = None
         self._connection_ssid = None
+        self._ap_shutdown_timer: Optional[threading.Timer] = None
 
         print(f"[WIFI] Provisioning initialized (AP+STA concurrent mode)")
         print(f"[WIFI] Station interface: {self._interface}, AP interface: {self._ap_interface}")
@@ -263,6 +265,9 @@ class WiFiProvisioning:
         """
         print(f"[WIFI] Connecting to: {ssid} (AP stays active on uap0)")
 
+        # A new attempt supersedes any AP shutdown scheduled by a previous one
+        self.cancel_ap_shutdown()
+
         # Update connection state for frontend polling
         self._connection_state = "connecting"
         self._connection_error = None
@@ -329,18 +334,26 @@ class WiFiProvisioning:
 
     def schedule_ap_shutdown(self, delay_seconds: int = 60):
         """Schedule AP shutdown after successful WiFi connection."""
-        import threading
-
         def _delayed_shutdown():
-            print(f"[WIFI] AP will shut down in {delay_seconds} seconds...")
-            time.sleep(delay_seconds)
+            self._ap_shutdown_timer = None
             if self._connection_state == "connected":
                 print("[WIFI] Shutting down AP after successful connection")
                 self.stop_ap_mode()
             else:
                 print("[WIFI] AP shutdown cancelled (connection state changed)")
 
-        threading.Thread(target=_delayed_shutdown, daemon=True).start()
+        self.cancel_ap_shutdown()
+        print(f"[WIFI] AP will shut down in {delay_seconds} seconds...")
+        self._ap_shutdown_timer = threading.Timer(delay_seconds, _delayed_shutdown)
+        self._ap_shutdown_timer.daemon = True
+        self._ap_shutdown_timer.start()
+
+    def cancel_ap_shutdown(self):
+        """Cancel a pending AP shutdown, if any."""
+        timer = self._ap_shutdown_timer
+        if timer is not None:
+            timer.cancel()
+            self._ap_shutdown_timer = None
 
     def disconnect(self) -> Tuple[bool, str]:
         """Disconnect from current WiFi network."""